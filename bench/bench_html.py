@@ -0,0 +1,76 @@
+"""
+Compare HTML cleaners on synthetic chapters.
+
+    python -m bench.bench_html --chapters 200 --paragraphs 40
+
+regex          - the old strip_html: html.unescape, then a tag regex
+beautifulsoup  - the old alternate client: BeautifulSoup get_text (if bs4 is installed)
+html_text      - ingestion.html_text.html_to_text
+"""
+import argparse
+import html
+import re
+import time
+from typing import Callable, Dict, List
+
+from bench.mock_pratilipi import synthetic_chapter
+from ingestion.html_text import html_to_text
+
+_TAG = re.compile(r"<[^>]+>")
+
+
+def regex_cleaner(content: str) -> str:
+    return _TAG.sub("", html.unescape(content)).strip()
+
+
+def beautifulsoup_cleaner(content: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(content or "", "html.parser")
+    return "\n".join(line.strip() for line in soup.get_text("\n").splitlines() if line.strip())
+
+
+def cleaners() -> Dict[str, Callable[[str], str]]:
+    available = {"regex": regex_cleaner}
+    try:
+        import bs4  # noqa: F401
+        available["beautifulsoup"] = beautifulsoup_cleaner
+    except ImportError:
+        print("bs4 not installed, skipping the BeautifulSoup baseline")
+    available["html_text"] = html_to_text
+    return available
+
+
+def run(chapters: List[str], cleaner: Callable[[str], str], rounds: int) -> Dict[str, float]:
+    size_mb = sum(len(c.encode("utf-8")) for c in chapters) / (1024 * 1024)
+    best = float("inf")
+
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for chapter in chapters:
+            cleaner(chapter)
+        best = min(best, time.perf_counter() - started)
+
+    return {
+        "ms_per_chapter": best * 1000 / len(chapters),
+        "mb_per_s": size_mb / best if best else 0.0,
+    }
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chapters", type=int, default=200)
+    parser.add_argument("--paragraphs", type=int, default=40)
+    parser.add_argument("--rounds", type=int, default=3, help="best of N timed rounds")
+    args = parser.parse_args(argv)
+
+    chapters = [synthetic_chapter("bench-html", i, 0, args.paragraphs) for i in range(args.chapters)]
+    print(f"{len(chapters)} chapters, {sum(map(len, chapters)) / len(chapters):.0f} chars each")
+
+    for name, cleaner in cleaners().items():
+        stats = run(chapters, cleaner, args.rounds)
+        print(f"{name:>14}: {stats['ms_per_chapter']:.3f} ms/chapter, {stats['mb_per_s']:.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
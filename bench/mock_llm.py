@@ -0,0 +1,232 @@
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+_CHAPTER_HEADER = re.compile(r"^CHAPTER (\d+)$", re.MULTILINE)
+
+_HOOK_WORDS = (
+    "रात", "गहरी", "होती", "गई", "और", "हवेली", "के", "पीछे", "से", "आई",
+    "आवाज़", "ने", "मीरा", "को", "सोचने", "पर", "मजबूर", "कर", "दिया", "कि",
+    "क्या", "उसका", "सबसे", "बड़ा", "राज़", "अब", "खुलने", "वाला", "है", "सच",
+)
+
+
+class MockLLM:
+    """
+    Local OpenAI-compatible chat completions endpoint for benchmarks.
+
+    Latency is drawn from a log-normal distribution with median
+    `latency_ms` and shape `sigma`; streamed answers spread it over their
+    chunks. A `rate_429` share of requests is rejected with 429 and a
+    Retry-After of `retry_after` seconds. Answers are valid Hindi hooks, or
+    the JSON object asked for by windowed prompts, and every response
+    carries usage with a cached-token count.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        sigma: float = 0.5,
+        rate_429: float = 0.0,
+        retry_after: float = 0.2,
+        chunk_words: int = 3,
+        seed: int = 7,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.sigma = sigma
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.chunk_words = chunk_words
+        self.requests = 0
+        self.rejected = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            reject = self._random.random() < self.rate_429
+            if reject:
+                self.rejected += 1
+            latency = self.latency_ms / 1000.0 * math.exp(self._random.gauss(0.0, self.sigma)) if self.sigma else self.latency_ms / 1000.0
+        return reject, latency
+
+    @staticmethod
+    def hook_text(prompt: str, index: int = 0) -> str:
+        seed = hashlib.sha256(f"{prompt}|{index}".encode("utf-8")).digest()
+        rng = random.Random(seed)
+        words = [rng.choice(_HOOK_WORDS) for _ in range(rng.randint(14, 24))]
+        return " ".join(words) + "?"
+
+    def answer(self, body: dict, index: int = 0) -> str:
+        prompt = "".join(str(m.get("content", "")) for m in body.get("messages") or [])
+        chapters = [int(n) for n in _CHAPTER_HEADER.findall(prompt)]
+
+        if len(chapters) > 1:
+            hooks = [
+                {"chapter": number, "hook": self.hook_text(f"{prompt}|{number}", index)}
+                for number in chapters[1:]
+            ]
+            return json.dumps({"hooks": hooks}, ensure_ascii=False)
+
+        return self.hook_text(prompt, index)
+
+    @staticmethod
+    def usage(body: dict, completion: str) -> dict:
+        prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages") or [])
+        prompt_tokens = max(1, prompt_chars // 3)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": max(1, len(completion) // 3),
+            "total_tokens": prompt_tokens + max(1, len(completion) // 3),
+            "prompt_tokens_details": {"cached_tokens": prompt_tokens // 2},
+        }
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._json(404, {"error": {"message": f"Unknown path {self.path}"}})
+                    return
+
+                reject, latency = mock._draw()
+
+                if reject:
+                    time.sleep(min(latency, 0.05))
+                    self._json(
+                        429,
+                        {"error": {"message": "Rate limit exceeded", "type": "rate_limit_error"}},
+                        {"Retry-After": str(mock.retry_after)},
+                    )
+                    return
+
+                if body.get("stream"):
+                    self._stream(body, latency)
+                else:
+                    self._complete(body, latency)
+
+            def _complete(self, body: dict, latency: float) -> None:
+                time.sleep(latency)
+                n = int(body.get("n") or 1)
+                choices = [mock.answer(body, i) for i in range(n)]
+
+                self._json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model"),
+                    "choices": [
+                        {
+                            "index": i,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                        }
+                        for i, text in enumerate(choices)
+                    ],
+                    "usage": mock.usage(body, "".join(choices)),
+                })
+
+            def _stream(self, body: dict, latency: float) -> None:
+                text = mock.answer(body)
+                words = text.split(" ")
+                pieces: List[str] = [
+                    " ".join(words[i:i + mock.chunk_words]) + (" " if i + mock.chunk_words < len(words) else "")
+                    for i in range(0, len(words), mock.chunk_words)
+                ]
+
+                # A third of the latency goes to the first token, the rest
+                # is spread over the chunks.
+                time.sleep(latency / 3)
+                per_chunk = (latency * 2 / 3) / max(1, len(pieces))
+
+                completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.send_header("Connection", "close")
+                self.end_headers()
+
+                def event(payload: dict) -> None:
+                    self.wfile.write(b"data: " + json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n\n")
+                    self.wfile.flush()
+
+                try:
+                    for piece in pieces:
+                        event({
+                            "id": completion_id,
+                            "object": "chat.completion.chunk",
+                            "model": body.get("model"),
+                            "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                        })
+                        time.sleep(per_chunk)
+
+                    if (body.get("stream_options") or {}).get("include_usage"):
+                        event({
+                            "id": completion_id,
+                            "object": "chat.completion.chunk",
+                            "model": body.get("model"),
+                            "choices": [],
+                            "usage": mock.usage(body, text),
+                        })
+
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client closed the stream early once its guard was satisfied.
+                    pass
+
+                self.close_connection = True
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MockLLM":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
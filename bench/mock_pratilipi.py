@@ -0,0 +1,182 @@
+import hashlib
+import json
+import random
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional, Tuple
+
+# Common Hindi words the synthetic chapters are built from, so the
+# benchmarks exercise the Devanagari paths of the cleaner, token budget and
+# validator.
+_WORDS = (
+    "राज", "ने", "दरवाज़ा", "खोला", "और", "अंदर", "अंधेरा", "था", "उसकी", "माँ",
+    "चुपचाप", "खड़ी", "रही", "किसी", "को", "पता", "नहीं", "कि", "रात", "क्या",
+    "होने", "वाला", "है", "मीरा", "की", "आँखों", "में", "डर", "साफ़", "दिख",
+    "रहा", "हवेली", "के", "पीछे", "से", "एक", "आवाज़", "आई", "सब", "लोग",
+    "भागे", "पुराना", "राज़", "खुलने", "लगा", "अचानक", "फ़ोन", "बजा", "वह", "रुक",
+)
+
+
+_ALIASED_FETCH = re.compile(r"(\w+)\s*:\s*getPratilipiChapters\s*\(\s*where\s*:\s*\$(\w+)\s*\)")
+
+
+def _rng(*parts) -> random.Random:
+    seed = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return random.Random(int(seed[:16], 16))
+
+
+def synthetic_chapter(series_slug: str, part: int, chapter: int, paragraphs: int) -> str:
+    """
+    Deterministic HTML chapter of Hindi-like prose, one <p> per paragraph.
+    """
+    rng = _rng(series_slug, part, chapter)
+    html_paragraphs = []
+
+    for _ in range(paragraphs):
+        sentences = []
+        for _ in range(rng.randint(3, 7)):
+            sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 16)))
+            sentences.append(sentence + rng.choice(("।", "।", "?", "!")))
+        html_paragraphs.append(f"<p>{' '.join(sentences)}</p>")
+
+    return "\n".join(html_paragraphs)
+
+
+class MockPratilipi:
+    """
+    Local stand-in for the Pratilipi GraphQL endpoint.
+
+    Batched chapter fetches with aliased fields are answered in one
+    response. Every series slug is served as `parts` published parts with
+    `chapters_per_part` chapters of `paragraphs` paragraphs each. Content is
+    derived from the slug, so repeated runs see identical text.
+    `latency` adds a fixed delay in seconds to every response.
+    """
+
+    def __init__(
+        self,
+        parts: int = 50,
+        chapters_per_part: int = 1,
+        paragraphs: int = 20,
+        latency: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.parts = parts
+        self.chapters_per_part = chapters_per_part
+        self.paragraphs = paragraphs
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def part_ids(self, series_slug: str) -> List[str]:
+        return [f"{series_slug}-{i}" for i in range(self.parts)]
+
+    def series_page(self, series_slug: str, cursor: Optional[str], limit: int) -> Tuple[List[str], Optional[str]]:
+        start = int(cursor or 0)
+        ids = self.part_ids(series_slug)[start:start + limit]
+        end = start + len(ids)
+        return ids, str(end) if end < self.parts else None
+
+    def chapters(self, pratilipi_id: str) -> List[dict]:
+        series_slug, _, part = pratilipi_id.rpartition("-")
+        return [
+            {
+                "title": f"भाग {part}.{i + 1}",
+                "content": synthetic_chapter(series_slug, part, i, self.paragraphs),
+            }
+            for i in range(self.chapters_per_part)
+        ]
+
+    def answer(self, payload: dict) -> dict:
+        query = payload.get("query") or ""
+        variables = payload.get("variables") or {}
+
+        aliased = _ALIASED_FETCH.findall(query)
+        if aliased:
+            # Batched fetch: one aliased field per part.
+            return {
+                "data": {
+                    alias: {"chapters": self.chapters(variables[var]["pratilipiId"])}
+                    for alias, var in aliased
+                }
+            }
+
+        if "getPratilipiChapters" in query:
+            pid = variables["where"]["pratilipiId"]
+            return {"data": {"getPratilipiChapters": {"chapters": self.chapters(pid)}}}
+
+        if "getSeries" in query:
+            page = variables.get("page") or {}
+            ids, cursor = self.series_page(
+                variables["where"]["seriesSlug"],
+                page.get("cursor"),
+                int(page.get("limit") or 100),
+            )
+            return {
+                "data": {
+                    "getSeries": {
+                        "series": {
+                            "publishedParts": {
+                                "cursor": cursor,
+                                "parts": [{"pratilipi": {"pratilipiId": pid}} for pid in ids],
+                            }
+                        }
+                    }
+                }
+            }
+
+        return {"errors": [{"message": "Unknown query"}]}
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so the benchmarks see connection reuse.
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                with mock._lock:
+                    mock.requests += 1
+
+                if mock.latency:
+                    threading.Event().wait(mock.latency)
+
+                body = json.dumps(mock.answer(payload), ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "MockPratilipi":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
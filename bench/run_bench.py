@@ -0,0 +1,244 @@
+"""
+End-to-end benchmarks against local mock Pratilipi and LLM servers.
+
+    python -m bench.run_bench --scenario hooks --pairs 200 --workers 16
+    python -m bench.run_bench --scenario e2e --parts 100 --latency-ms 1500 --rate-429 0.05
+
+Each scenario prints throughput, per-item p50/p95/p99 latency and the
+peak RSS of the process; --json also writes them to a file. Peak RSS is a
+high-water mark for the whole process, so run one scenario per invocation
+when comparing memory.
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+from dotenv import load_dotenv
+
+from bench.mock_llm import MockLLM
+from bench.mock_pratilipi import MockPratilipi, synthetic_chapter
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = q * (len(ordered) - 1)
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(name: str, items: int, elapsed: float, latencies: List[float], unit: str) -> Dict:
+    return {
+        "scenario": name,
+        unit: items,
+        "elapsed_s": round(elapsed, 3),
+        f"{unit}_per_s": round(items / elapsed, 3) if elapsed else 0.0,
+        "p50_s": round(percentile(latencies, 0.50), 4),
+        "p95_s": round(percentile(latencies, 0.95), 4),
+        "p99_s": round(percentile(latencies, 0.99), 4),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def _timed(fn: Callable, latencies: List[float]) -> Callable:
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - started)
+    return wrapper
+
+
+def configure(llm: MockLLM, pratilipi: MockPratilipi, args) -> None:
+    """
+    Point the pipeline at the mock servers. Must run before the first LLM
+    call, since the gateway client, cache and limiter are built lazily from env.
+    """
+    os.environ["TFY_BASE_URL"] = llm.base_url
+    os.environ["TFY_API_KEY"] = "bench"
+    os.environ["LLM_CACHE_MODE"] = "on" if args.cache else "off"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(args.work_dir, "llm_responses.sqlite3")
+    os.environ.setdefault("LLM_MAX_RPS", "1000")
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", str(args.workers))
+    os.environ.setdefault("LLM_INITIAL_CONCURRENCY", str(args.workers))
+
+    # The local config module holds real credentials and is not checked in;
+    # the mock server needs none of them.
+    try:
+        import config  # noqa: F401
+    except ImportError:
+        stub = types.ModuleType("config")
+        stub.PRATILIPI_BASE_URL = pratilipi.url.rsplit("/", 1)[0]
+        stub.PRATILIPI_GRAPHQL_URL = pratilipi.url
+        stub.PRATILIPI_TOKEN = "bench"
+        stub.USER_AGENT = "pre-cap-bench"
+        sys.modules["config"] = stub
+
+    from ingestion import api_client
+    api_client.PRATILIPI_GRAPHQL_URL = pratilipi.url
+
+
+def run_ingest(args, pratilipi: MockPratilipi) -> Dict:
+    from ingestion.async_ingest import AsyncChapterIngestor
+    from ingestion.ingest_chapter import ChapterIngestor
+
+    base = ChapterIngestor(use_store=False)
+    latencies: List[float] = []
+    # Batched ingestion goes through get_chapters_many, one latency per request.
+    base.get_chapters = _timed(base.get_chapters, latencies)
+    base.get_chapters_many = _timed(base.get_chapters_many, latencies)
+    ingestor = AsyncChapterIngestor(base, max_concurrency=args.ingest_workers)
+
+    started = time.perf_counter()
+    chapters = 0
+    for i in range(args.series):
+        for _ in ingestor.iter_series_chapters(f"bench-{i}", language="hi"):
+            chapters += 1
+    elapsed = time.perf_counter() - started
+    ingestor.close()
+    base.close()
+
+    return summarize("ingest", chapters, elapsed, latencies, "chapters")
+
+
+def run_hooks(args, pratilipi: MockPratilipi) -> Dict:
+    from ingestion.api_client import strip_html
+    from pipeline.runner import process_chapter
+
+    texts = [
+        strip_html(synthetic_chapter("bench-hooks", i, 0, pratilipi.paragraphs))
+        for i in range(args.pairs + 1)
+    ]
+
+    latencies: List[float] = []
+    worker = _timed(process_chapter, latencies)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(
+                worker,
+                chapter_id=f"bench_chapter_{i + 1}",
+                previous_chapter_text=texts[i - 1],
+                current_chapter_text=texts[i],
+                model=args.model,
+                best_of=args.best_of,
+            )
+            for i in range(1, len(texts))
+        ]
+        hooks = sum(1 for f in futures if f.result())
+    elapsed = time.perf_counter() - started
+
+    return summarize("hooks", hooks, elapsed, latencies, "hooks")
+
+
+def run_e2e(args, pratilipi: MockPratilipi) -> Dict:
+    import main
+    from metrics import metrics
+
+    started = time.perf_counter()
+    cwd = os.getcwd()
+    os.chdir(args.work_dir)
+    try:
+        main.run_series(
+            "bench-e2e",
+            language="hi",
+            llm_workers=args.workers,
+            ingest_workers=args.ingest_workers,
+            model=args.model,
+            window=args.window,
+            best_of=args.best_of,
+            formats=("jsonl",),
+        )
+        with open(f"bench-e2e_{args.model.split('/')[-1]}.jsonl", "r", encoding="utf-8") as f:
+            hooks = sum(1 for line in f if line.strip())
+    finally:
+        os.chdir(cwd)
+    elapsed = time.perf_counter() - started
+
+    # Per-hook latency is not visible from outside run_series, so report
+    # the LLM call latency recorded by the pipeline's own metrics.
+    llm = metrics.report()["stages"].get("llm_call") or {}
+    result = summarize("e2e", hooks, elapsed, [], "hooks")
+    result.update({k: llm.get(k, 0.0) for k in ("p50_s", "p95_s", "p99_s")})
+    return result
+
+
+SCENARIOS = {
+    "ingest": run_ingest,
+    "hooks": run_hooks,
+    "e2e": run_e2e,
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark hook generation against local mock servers.")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="hooks")
+    parser.add_argument("--series", type=int, default=1, help="series to ingest (ingest scenario)")
+    parser.add_argument("--parts", type=int, default=50, help="published parts per mock series")
+    parser.add_argument("--paragraphs", type=int, default=20, help="paragraphs per mock chapter")
+    parser.add_argument("--pairs", type=int, default=100, help="chapter pairs (hooks scenario)")
+    parser.add_argument("--graphql-latency-ms", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=800.0, help="median mock LLM latency")
+    parser.add_argument("--sigma", type=float, default=0.5, help="log-normal shape of the LLM latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="share of LLM requests rejected with 429")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--ingest-workers", type=int, default=8)
+    parser.add_argument("--model", default="grok")
+    parser.add_argument("--window", type=int, default=1)
+    parser.add_argument("--best-of", type=int, default=1)
+    parser.add_argument("--cache", action="store_true", help="leave the LLM response cache on")
+    parser.add_argument("--work-dir", help="directory for outputs (default: a temp dir)")
+    parser.add_argument("--json", help="also write the result to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> Dict:
+    # .env may tune the limiter; configure() only sets what it leaves unset.
+    load_dotenv()
+    args = parse_args(argv)
+    args.work_dir = args.work_dir or tempfile.mkdtemp(prefix="hook-bench-")
+
+    with MockPratilipi(
+        parts=args.parts,
+        paragraphs=args.paragraphs,
+        latency=args.graphql_latency_ms / 1000.0,
+    ) as pratilipi, MockLLM(
+        latency_ms=args.latency_ms,
+        sigma=args.sigma,
+        rate_429=args.rate_429,
+    ) as llm:
+        configure(llm, pratilipi, args)
+        result = SCENARIOS[args.scenario](args, pratilipi)
+        result["llm_requests"] = llm.requests
+        result["llm_429s"] = llm.rejected
+        result["graphql_requests"] = pratilipi.requests
+
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,107 @@
 import requests
-import html
+import codecs
+import inspect
+import mmap
+import os
 import re
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from config import (
     PRATILIPI_GRAPHQL_URL,
     USER_AGENT,
     PRATILIPI_TOKEN,
 )
+from ingestion.html_text import html_to_text, iter_html_text
+from metrics import metrics, timed
 
 def strip_html(text: str) -> str:
-    """Remove HTML tags from content."""
-    return re.sub(r"<[^>]+>", "", text or "")
+    """Convert HTML content to plain text, keeping paragraph breaks."""
+    return html_to_text(text or "")
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+try:
+    import brotli  # noqa: F401  urllib3 decodes br responses when it is installed
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+
+def build_session(
+    pool_size: int = 16,
+    max_retries: int = 3,
+    backoff: float = 0.5,
+) -> requests.Session:
+    """
+    Keep-alive session with one connection pool of `pool_size` per host.
+
+    429 and 5xx responses and connection errors are retried with
+    exponential backoff (jittered on urllib3 2.x), honouring Retry-After.
+    GraphQL reads go over POST, so POST is retried too.
+    """
+    retry_args = dict(
+        total=max_retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRYABLE_STATUS,
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    if "backoff_jitter" in inspect.signature(Retry.__init__).parameters:
+        retry_args["backoff_jitter"] = backoff
+
+    adapter = HTTPAdapter(
+        pool_connections=pool_size,
+        pool_maxsize=pool_size,
+        max_retries=Retry(**retry_args),
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class PratilipiClient:
     """
     Client responsible for interacting with Pratilipi GraphQL APIs.
+
+    All requests share one pooled, retrying session, which is safe to use
+    from the ingestion threads. Size `pool_size` to the number of workers
+    fetching at once so connections are reused rather than reopened.
     """
 
+    def __init__(
+        self,
+        pool_size: int = 16,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        batch_size: int = 8,
+        max_batch_size: int = 32,
+        target_batch_bytes: int = 2 * 1024 * 1024,
+    ):
+        self.session = build_session(pool_size, max_retries, backoff)
+        self._headers: Dict[str, dict] = {}
+
+        self.max_batch_size = max_batch_size
+        self.target_batch_bytes = target_batch_bytes
+        self.batch_size = min(batch_size, max_batch_size)
+
     def _graphql_headers(self, language: str = "en") -> dict:
+        cached = self._headers.get(language)
+        if cached is not None:
+            return cached
+
         headers = {
             "client-type": "ANDROID_APP",
             "apollographql-client-name": "ANDROID",
             "apollographql-client-version": "8.13.0",
             "Access-Token": PRATILIPI_TOKEN,
             "Content-Type": "application/json",
+            "Accept-Encoding": ACCEPT_ENCODING,
         }
 
         if USER_AGENT:
@@ -33,11 +110,31 @@ class PratilipiClient:
         if language:
             headers["language"] = language
 
+        self._headers[language] = headers
         return headers
 
-    def get_pratilipi_ids_from_series(self, series_slug: str) -> List[str]:
+    def _request(self, query: str, variables: dict, language: str = "en") -> requests.Response:
+        resp = self.session.post(
+            PRATILIPI_GRAPHQL_URL,
+            headers=self._graphql_headers(language),
+            json={"query": query, "variables": variables},
+            timeout=(10, 30),
+        )
+        resp.raise_for_status()
+        return resp
+
+    def _post(self, query: str, variables: dict, language: str = "en") -> dict:
+        return self._request(query, variables, language).json()
+
+    @timed("series_listing")
+    def _fetch_series_page(
+        self,
+        series_slug: str,
+        cursor: str,
+        limit: int,
+    ) -> Tuple[List[str], Optional[str]]:
         """
-        Fetch all pratilipiIds belonging to a series.
+        Fetch one page of published part ids and the cursor of the next page.
         """
         query = """
         query getSeriesPartsPaginatedBySlug(
@@ -47,6 +144,7 @@ class PratilipiClient:
           getSeries(where: $where) {
             series {
               publishedParts(page: $page) {
+                cursor
                 parts {
                   pratilipi {
                     pratilipiId
@@ -60,33 +158,66 @@ class PratilipiClient:
 
         variables = {
             "where": {"seriesSlug": series_slug},
-            "page": {"limit": 100, "cursor": "0"},
+            "page": {"limit": limit, "cursor": cursor},
         }
 
-        resp = requests.post(
-            PRATILIPI_GRAPHQL_URL,
-            headers=self._graphql_headers(),
-            json={"query": query, "variables": variables},
-            timeout=30,
-        )
-        resp.raise_for_status()
-
-        data = resp.json()
+        data = self._post(query, variables)
 
-        parts = (
-            data.get("data", {})
+        published_parts = (
+            (data.get("data") or {})
             .get("getSeries", {})
             .get("series", {})
-            .get("publishedParts", {})
-            .get("parts", [])
+            .get("publishedParts")
+            or {}
         )
 
-        return [
+        ids = [
             p["pratilipi"]["pratilipiId"]
-            for p in parts
+            for p in published_parts.get("parts") or []
             if p.get("pratilipi")
         ]
 
+        return ids, published_parts.get("cursor")
+
+    def iter_pratilipi_ids_from_series(
+        self,
+        series_slug: str,
+        page_size: int = 100,
+    ) -> Iterator[str]:
+        """
+        Stream pratilipiIds of a series in published order, following the
+        page cursor to the end.
+
+        The next page is requested in the background as soon as the current
+        one arrives, so callers can work on the first ids while the rest of
+        the listing is still being fetched.
+        """
+        prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="series-pages")
+        seen_cursors = set()
+
+        try:
+            future = prefetcher.submit(self._fetch_series_page, series_slug, "0", page_size)
+
+            while future is not None:
+                ids, next_cursor = future.result()
+                future = None
+
+                if ids and next_cursor and next_cursor not in seen_cursors:
+                    seen_cursors.add(next_cursor)
+                    future = prefetcher.submit(
+                        self._fetch_series_page, series_slug, next_cursor, page_size
+                    )
+
+                yield from ids
+        finally:
+            prefetcher.shutdown(wait=False, cancel_futures=True)
+
+    def get_pratilipi_ids_from_series(self, series_slug: str) -> List[str]:
+        """
+        Fetch all pratilipiIds belonging to a series.
+        """
+        return list(self.iter_pratilipi_ids_from_series(series_slug))
+
     def fetch_chapter_content(
         self,
         pratilipi_id: str,
@@ -112,15 +243,8 @@ class PratilipiClient:
             }
         }
 
-        resp = requests.post(
-            PRATILIPI_GRAPHQL_URL,
-            headers=self._graphql_headers(language),
-            json={"query": query, "variables": variables},
-            timeout=30,
-        )
-        resp.raise_for_status()
-
-        data = resp.json()
+        with metrics.stage("chapter_fetch"):
+            data = self._post(query, variables, language)
 
         raw_chapters = (
             data.get("data", {})
@@ -128,6 +252,9 @@ class PratilipiClient:
             .get("chapters", [])
         )
 
+        return self._clean_chapters(pratilipi_id, raw_chapters)
+
+    def _clean_chapters(self, pratilipi_id: str, raw_chapters: List[dict]) -> List[str]:
         cleaned_chapters: List[str] = []
 
         for ch in raw_chapters:
@@ -138,7 +265,8 @@ class PratilipiClient:
                 print(f"Skipping locked chapter: {title}")
                 continue
 
-            cleaned = strip_html(html.unescape(content)).strip()
+            with metrics.stage("cleaning"):
+                cleaned = html_to_text(content).strip()
 
             if cleaned:
                 cleaned_chapters.append(cleaned)
@@ -148,39 +276,169 @@ class PratilipiClient:
 
         return cleaned_chapters
 
-def fetch_chapters_from_html_file(
-    path: str,
-) -> List[str]:
+    def fetch_chapter_contents(
+        self,
+        pratilipi_ids: List[str],
+        language: str = "en",
+    ) -> Dict[str, List[str]]:
         """
-        Read and split chapters from a local HTML/text file.
-
-        Assumes chapters are separated by lines like:
-        1.
-        25.
-        200.
+        Fetch and clean the chapters of many pratilipiIds, several per request.
+
+        Each request packs up to `batch_size` ids into one GraphQL document
+        as aliased getPratilipiChapters fields. The batch size then adapts
+        so a response stays near `target_batch_bytes`, and it is halved when
+        a batched request fails. Ids missing from a batched answer, or
+        reported in its errors, are refetched one by one. Returns the same
+        cleaned chapters as fetch_chapter_content for every id that could be
+        fetched. Ids that fail on their own too are left out and logged.
+        """
+        results: Dict[str, List[str]] = {}
+        pending = [str(pid) for pid in pratilipi_ids]
+
+        while pending:
+            batch, pending = pending[:self.batch_size], pending[self.batch_size:]
+
+            if len(batch) == 1:
+                fetched, failed = {}, batch
+            else:
+                try:
+                    fetched, failed = self._fetch_batch(batch, language)
+                except Exception as e:
+                    print(f"⚠ Batched fetch of {len(batch)} parts failed, retrying smaller: {e}")
+                    self._resize_batch(self.batch_size // 2)
+                    if len(batch) > self.batch_size > 1:
+                        pending = batch + pending
+                        continue
+                    fetched, failed = {}, batch
+
+            results.update(fetched)
+
+            for pid in failed:
+                try:
+                    results[pid] = self.fetch_chapter_content(pid, language)
+                except Exception as e:
+                    print(f"⚠ Fetch failed for pratilipiId={pid}: {e}")
+
+        return results
+
+    def _fetch_batch(
+        self,
+        pratilipi_ids: List[str],
+        language: str,
+    ) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        One aliased request for `pratilipi_ids`; returns (cleaned chapters
+        per id, ids that need a retry).
         """
+        declarations = ", ".join(
+            f"$w{i}: GetPratilipiChaptersQueryInput!" for i in range(len(pratilipi_ids))
+        )
+        fields = "\n".join(
+            f"p{i}: getPratilipiChapters(where: $w{i}) {{ chapters {{ title content }} }}"
+            for i in range(len(pratilipi_ids))
+        )
+        query = f"query ({declarations}) {{\n{fields}\n}}"
+        variables = {f"w{i}": {"pratilipiId": pid} for i, pid in enumerate(pratilipi_ids)}
 
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                raw_text = f.read()
-        except FileNotFoundError:
-            print(f"⚠ File not found: {path}")
-            return []
+        with metrics.stage("chapter_fetch"):
+            resp = self._request(query, variables, language)
+            data = resp.json()
 
-        raw_text = strip_html(html.unescape(raw_text))
+        self._resize_batch(self.target_batch_bytes * len(pratilipi_ids) // max(1, len(resp.content)))
 
-        raw_text = raw_text.replace("\r\n", "\n")
+        errored = {
+            str(error["path"][0])
+            for error in data.get("errors") or []
+            if error.get("path")
+        }
+        answers = data.get("data") or {}
 
-        chapter_blocks = re.split(r"\n\s*Chapter\s+\d+\s*\n", raw_text, flags=re.IGNORECASE)
+        fetched: Dict[str, List[str]] = {}
+        failed: List[str] = []
 
-        cleaned_chapters: List[str] = []
+        for i, pid in enumerate(pratilipi_ids):
+            answer = answers.get(f"p{i}")
+            if answer is None or f"p{i}" in errored:
+                failed.append(pid)
+                continue
+            fetched[pid] = self._clean_chapters(pid, answer.get("chapters") or [])
 
-        for block in chapter_blocks:
-            cleaned = block.strip()
-            if cleaned:
-                cleaned_chapters.append(cleaned)
+        return fetched, failed
 
-        if not cleaned_chapters:
-            print(f"⚠ No usable chapters found in file: {path}")
+    def _resize_batch(self, size: int) -> None:
+        self.batch_size = max(1, min(self.max_batch_size, size))
 
-        return cleaned_chapters
+_CHAPTER_HEADING = re.compile(r"^\s*Chapter\s+\d+\s*$", re.IGNORECASE)
+
+
+def _iter_file_chunks(mapped: mmap.mmap, chunk_size: int) -> Iterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for offset in range(0, len(mapped), chunk_size):
+        yield decoder.decode(mapped[offset:offset + chunk_size])
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_chapters_from_html_file(
+    path: str,
+    chunk_size: int = 1 << 20,
+) -> Iterator[str]:
+    """
+    Stream chapters out of a local HTML/text export, one at a time.
+
+    The file is memory-mapped and cleaned `chunk_size` bytes at a time, and
+    chapters are cut at lines like "Chapter 25", so only the chapter being
+    assembled is held in memory however large the export is.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        print(f"⚠ File not found: {path}")
+        return
+
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            lines: List[str] = []
+            partial = ""
+
+            for text in iter_html_text(_iter_file_chunks(mapped, chunk_size)):
+                *complete, partial = (partial + text).split("\n")
+
+                for line in complete:
+                    if _CHAPTER_HEADING.match(line):
+                        chapter = "\n".join(lines).strip()
+                        if chapter:
+                            yield chapter
+                        lines = []
+                    else:
+                        lines.append(line)
+
+            if not _CHAPTER_HEADING.match(partial):
+                lines.append(partial)
+
+            chapter = "\n".join(lines).strip()
+            if chapter:
+                yield chapter
+
+
+def fetch_chapters_from_html_file(
+    path: str,
+) -> List[str]:
+    """
+    Read and split chapters from a local HTML/text file.
+
+    Assumes chapters are separated by lines like:
+    Chapter 1
+    Chapter 25
+    Chapter 200
+    """
+    cleaned_chapters = list(iter_chapters_from_html_file(path))
+
+    if not cleaned_chapters and os.path.exists(path):
+        print(f"⚠ No usable chapters found in file: {path}")
+
+    return cleaned_chapters
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Optional, NamedTuple
+
+from ingestion.html_text import CLEANER_VERSION
+
+DEFAULT_STORE_PATH = ".cache/chapters.sqlite3"
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class StoredChapters(NamedTuple):
+    chapters: List[str]
+    content_hash: str
+    fetched_at: float
+    cleaner_version: str
+
+
+def content_hash(chapters: List[str]) -> str:
+    """Stable hash of the cleaned chapter texts of one pratilipiId."""
+    digest = hashlib.sha256()
+    for chapter in chapters:
+        digest.update(chapter.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ChapterStore:
+    """
+    On-disk store of cleaned chapter text keyed by (pratilipiId, language).
+
+    Text is kept zlib-compressed alongside its content hash, the time it
+    was last fetched from the API and the version of the HTML cleaner that
+    produced it. `ttl` decides when an entry is stale and must be refetched;
+    None keeps entries forever. Entries from another `cleaner_version` are
+    always stale.
+    """
+
+    def __init__(
+        self,
+        path: str = DEFAULT_STORE_PATH,
+        ttl: Optional[float] = DEFAULT_TTL,
+        cleaner_version: str = CLEANER_VERSION,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.cleaner_version = cleaner_version
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS chapters (
+                pratilipi_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                content BLOB NOT NULL,
+                content_hash TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                cleaner_version TEXT NOT NULL DEFAULT '',
+                PRIMARY KEY (pratilipi_id, language)
+            )
+            """
+        )
+
+        # Stores written before the version was recorded hold text from the
+        # old regex cleaner; the empty default marks those rows as stale.
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(chapters)")}
+        if "cleaner_version" not in columns:
+            self._conn.execute(
+                "ALTER TABLE chapters ADD COLUMN cleaner_version TEXT NOT NULL DEFAULT ''"
+            )
+        self._conn.commit()
+
+    def get(self, pratilipi_id: str, language: str) -> Optional[StoredChapters]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT content, content_hash, fetched_at, cleaner_version FROM chapters
+                WHERE pratilipi_id = ? AND language = ?
+                """,
+                (str(pratilipi_id), language),
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        content, stored_hash, fetched_at, cleaner_version = row
+        chapters = json.loads(zlib.decompress(content).decode("utf-8"))
+        return StoredChapters(chapters, stored_hash, fetched_at, cleaner_version)
+
+    def is_fresh(self, entry: StoredChapters) -> bool:
+        if entry.cleaner_version != self.cleaner_version:
+            return False
+        if self.ttl is None:
+            return True
+        return time.time() - entry.fetched_at < self.ttl
+
+    def put(self, pratilipi_id: str, language: str, chapters: List[str]) -> StoredChapters:
+        entry = StoredChapters(chapters, content_hash(chapters), time.time(), self.cleaner_version)
+        content = zlib.compress(
+            json.dumps(chapters, ensure_ascii=False).encode("utf-8")
+        )
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO chapters
+                    (pratilipi_id, language, content, content_hash, fetched_at, cleaner_version)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    str(pratilipi_id),
+                    language,
+                    content,
+                    entry.content_hash,
+                    entry.fetched_at,
+                    entry.cleaner_version,
+                ),
+            )
+            self._conn.commit()
+
+        return entry
+
+    def touch(self, pratilipi_id: str, language: str) -> None:
+        """Mark an entry as revalidated without rewriting its content."""
+        with self._lock:
+            self._conn.execute(
+                """
+                UPDATE chapters SET fetched_at = ?, cleaner_version = ?
+                WHERE pratilipi_id = ? AND language = ?
+                """,
+                (time.time(), self.cleaner_version, str(pratilipi_id), language),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def open_chapter_store() -> ChapterStore:
+    """
+    Open the chapter store configured in env.
+
+    HOOK_CHAPTER_STORE_PATH  sqlite file (default .cache/chapters.sqlite3)
+    HOOK_CHAPTER_STORE_TTL   seconds before a part is refetched (default
+                             7 days); "none" keeps parts until the cleaner
+                             version changes
+    """
+    raw_ttl = os.getenv("HOOK_CHAPTER_STORE_TTL", "").strip().lower()
+    if not raw_ttl:
+        ttl = DEFAULT_TTL
+    elif raw_ttl == "none":
+        ttl = None
+    else:
+        ttl = float(raw_ttl)
+
+    return ChapterStore(
+        path=os.getenv("HOOK_CHAPTER_STORE_PATH", DEFAULT_STORE_PATH),
+        ttl=ttl,
+    )
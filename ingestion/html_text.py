@@ -0,0 +1,165 @@
+import re
+from html import unescape
+from html.parser import HTMLParser
+from typing import Iterable, Iterator, List
+
+# Tags that end a paragraph; their text is separated by a blank line.
+BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "dd", "div", "dl", "dt",
+    "figcaption", "figure", "footer", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section",
+    "table", "tr", "ul",
+})
+
+# Tags whose contents are never reader-visible text.
+SKIP_TAGS = frozenset({"head", "script", "style", "template", "noscript"})
+
+# Stored chapters cleaned by another version are cleaned again; bump it
+# whenever a change here changes the text html_to_text returns.
+CLEANER_VERSION = "html-parser-1"
+
+_LINES = re.compile(r"([^\S\n]*\n\s*)")
+_ESCAPED_TAG = re.compile(r"&lt;/?[a-zA-Z]")
+
+
+class HtmlTextExtractor(HTMLParser):
+    """
+    Streaming HTML to plain text converter.
+
+    Paragraph-level tags become blank lines, <br> and source newlines become
+    line breaks, runs of other whitespace (including &nbsp;) collapse to one
+    space, and entities are decoded by the parser as it goes. Feed the
+    document in any number of chunks and collect text with drain() as it
+    becomes final, so a chapter never has to exist as one string.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._skip = 0
+        self._started = False
+        self._space = False
+        self._tag_break = 0
+        self._newlines = 0
+
+    def _break(self, level: int) -> None:
+        if self._started:
+            self._tag_break = max(self._tag_break, level)
+            self._space = False
+
+    def _emit(self, text: str, leading_space: bool) -> None:
+        breaks = max(self._tag_break, min(2, self._newlines)) if self._started else 0
+        if breaks:
+            self._parts.append("\n" * breaks)
+        elif self._started and (self._space or leading_space):
+            self._parts.append(" ")
+
+        self._parts.append(text)
+        self._started = True
+        self._tag_break = 0
+        self._newlines = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag == "br":
+            self._break(1)
+        elif tag in BLOCK_TAGS:
+            self._break(2)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in BLOCK_TAGS:
+            self._break(2)
+
+    def handle_data(self, data):
+        if self._skip or not data:
+            return
+
+        pieces = _LINES.split(data) if "\n" in data else (data,)
+
+        for i, piece in enumerate(pieces):
+            if i % 2:
+                # Separator: a run of whitespace containing newlines.
+                if self._started:
+                    self._newlines += piece.count("\n")
+                    self._space = False
+                continue
+
+            words = piece.split()
+            if not words:
+                if piece and self._started:
+                    self._space = True
+                continue
+
+            self._emit(" ".join(words), piece[0].isspace())
+            self._space = piece[-1].isspace()
+
+    def drain(self) -> str:
+        """Text produced since the last drain."""
+        text = "".join(self._parts)
+        self._parts = []
+        return text
+
+
+def _needs_unescape(head: str) -> bool:
+    # Some exports escape the markup itself ("&lt;p&gt;"); decode it once so
+    # the tags are parsed instead of kept as text.
+    escaped = _ESCAPED_TAG.search(head)
+    tag = head.find("<")
+    return escaped is not None and (tag == -1 or escaped.start() < tag)
+
+
+def iter_html_text(chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Convert HTML arriving in `chunks` and yield text pieces as soon as they
+    are final. Joined, the pieces equal html_to_text of the whole document.
+    """
+    parser = HtmlTextExtractor()
+    unescape_markup = None
+    carry = ""
+
+    for chunk in chunks:
+        if unescape_markup is None:
+            # Decide from the first 256 characters, however they are chunked.
+            carry += chunk
+            if len(carry) < 256:
+                continue
+            chunk, carry = carry, ""
+            unescape_markup = _needs_unescape(chunk[:256])
+
+        if unescape_markup:
+            # Hold back an entity cut in half by the chunk boundary.
+            chunk = carry + chunk
+            amp = chunk.rfind("&")
+            if amp != -1 and ";" not in chunk[amp:] and len(chunk) - amp < 12:
+                chunk, carry = chunk[:amp], chunk[amp:]
+            else:
+                carry = ""
+            chunk = unescape(chunk)
+
+        parser.feed(chunk)
+        text = parser.drain()
+        if text:
+            yield text
+
+    if carry:
+        if unescape_markup is None:
+            unescape_markup = _needs_unescape(carry[:256])
+        parser.feed(unescape(carry) if unescape_markup else carry)
+    parser.close()
+    text = parser.drain()
+    if text:
+        yield text
+
+
+def html_to_text(html: str, chunk_size: int = 1 << 16) -> str:
+    """
+    Clean one HTML chapter into text with its paragraph and line structure.
+    Large documents are fed to the parser `chunk_size` characters at a time.
+    """
+    if not html:
+        return ""
+    chunks = (html[i:i + chunk_size] for i in range(0, len(html), chunk_size))
+    return "".join(iter_html_text(chunks))
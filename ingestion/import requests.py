@@ -1,11 +1,12 @@
 import requests
 import config
-from bs4 import BeautifulSoup
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from typing import List, Dict, Any
 
+from ingestion.html_text import html_to_text
+
 BASE_URL = config.PRATILIPI_BASE_URL
 GRAPHQL_URL = getattr(config, "PRATILIPI_GRAPHQL_URL", f"{BASE_URL}/graphql")
 
@@ -117,12 +118,7 @@ class PratilipiClient:
 
     def _html_to_text(self, html: str) -> str:
         """Convert HTML to normalized plain text."""
-        soup = BeautifulSoup(html or "", "html.parser")
-        return "\n".join(
-            line.strip()
-            for line in soup.get_text("\n").splitlines()
-            if line.strip()
-        )
+        return html_to_text(html or "")
 
     # REST iterative fallback 
     def get_chapter_index(self, pratilipi_id: str) -> List[Dict[str, Any]]:
@@ -1,13 +1,120 @@
-from ingestion.api_client import PratilipiClient
+from typing import Dict, List, Optional
+
+from ingestion.api_client import PratilipiClient, iter_chapters_from_html_file
+from ingestion.chapter_store import ChapterStore, content_hash, open_chapter_store
 
 class ChapterIngestor:
-    def __init__(self):
-        self.client = PratilipiClient()
+    def __init__(
+        self,
+        store: Optional[ChapterStore] = None,
+        use_store: bool = True,
+        pool_size: int = 16,
+    ):
+        self.client = PratilipiClient(pool_size=pool_size)
+        # A store passed in belongs to the caller and is left open by close().
+        self._owns_store = store is None and use_store
+        self.store = store if store is not None else (open_chapter_store() if use_store else None)
 
-    def iter_series_chapters(self, series_slug: str, language: str = "en"):
-        pratilipi_ids = self.client.get_pratilipi_ids_from_series(series_slug)
+    def get_chapters(self, pratilipi_id: str, language: str = "en") -> List[str]:
+        """
+        Return cleaned chapters for a pratilipiId, served from the local
+        store while fresh and refetched from the API once the TTL expires.
+        """
+        if self.store is None:
+            return self.client.fetch_chapter_content(pratilipi_id, language)
+
+        entry = self.store.get(pratilipi_id, language)
+        if entry is not None and self.store.is_fresh(entry):
+            return entry.chapters
+
+        try:
+            chapters = self.client.fetch_chapter_content(pratilipi_id, language)
+        except Exception as e:
+            if entry is None:
+                raise
+            print(f"⚠ Refetch failed for pratilipiId={pratilipi_id}, using stored copy: {e}")
+            return entry.chapters
+
+        return self._remember(pratilipi_id, language, entry, chapters)
+
+    def _remember(self, pratilipi_id: str, language: str, entry, chapters: List[str]) -> List[str]:
+        # Locked or empty responses are not stored so they are retried next run.
+        if not chapters:
+            return entry.chapters if entry is not None else chapters
+
+        if entry is not None and entry.content_hash == content_hash(chapters):
+            self.store.touch(pratilipi_id, language)
+        else:
+            self.store.put(pratilipi_id, language, chapters)
+
+        return chapters
+
+    def get_chapters_many(self, pratilipi_ids: List[str], language: str = "en") -> Dict[str, List[str]]:
+        """
+        get_chapters for several pratilipiIds, fetching every id that is not
+        fresh in the store through batched GraphQL requests. Ids that cannot
+        be fetched and have no stored copy raise, like get_chapters, once
+        every other id of the batch has been stored.
+        """
+        entries = {}
+        results: Dict[str, List[str]] = {}
 
         for pid in pratilipi_ids:
-            chapters = self.client.fetch_chapter_content(pid, language)
+            entry = self.store.get(pid, language) if self.store is not None else None
+            if entry is not None and self.store.is_fresh(entry):
+                results[pid] = entry.chapters
+            else:
+                entries[pid] = entry
+
+        fetched = self.client.fetch_chapter_contents(list(entries), language) if entries else {}
+
+        missing = []
+
+        for pid, entry in entries.items():
+            if pid in fetched:
+                chapters = fetched[pid]
+                results[pid] = chapters if self.store is None else self._remember(pid, language, entry, chapters)
+            elif entry is not None:
+                print(f"⚠ Refetch failed for pratilipiId={pid}, using stored copy")
+                results[pid] = entry.chapters
+            else:
+                missing.append(pid)
+
+        # An empty part would shift the numbering of every later chapter.
+        if missing:
+            raise RuntimeError(f"Could not fetch chapters for pratilipiId={', '.join(missing)}")
+
+        return results
+
+    def iter_series_chapters(self, series_slug: str, language: str = "en"):
+        for pid in self.client.iter_pratilipi_ids_from_series(series_slug):
+            chapters = self.get_chapters(pid, language)
             for chapter_text in chapters:
                 yield chapter_text
+
+    def close(self) -> None:
+        self.client.session.close()
+        if self._owns_store:
+            self.store.close()
+
+
+class HtmlFileIngestor:
+    """
+    Drop-in for ChapterIngestor/AsyncChapterIngestor that reads each series
+    from a local HTML export instead of the API.
+
+    `path_template` is formatted with the series slug, e.g.
+    "exports/{series_slug}.html". Chapters are streamed from the file one
+    at a time.
+    """
+
+    def __init__(self, path_template: str = "{series_slug}.html", chunk_size: int = 1 << 20):
+        self.path_template = path_template
+        self.chunk_size = chunk_size
+
+    def iter_series_chapters(self, series_slug: str, language: str = "en"):
+        path = self.path_template.format(series_slug=series_slug)
+        return iter_chapters_from_html_file(path, self.chunk_size)
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,294 @@
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from metrics import metrics
+
+CACHE_MODES = ("on", "off", "refresh")
+
+
+class ResponseCache:
+    """
+    Disk-backed cache of chat completion responses.
+
+    Entries are keyed by model, temperature, max_tokens and a hash of the
+    messages. A single SQLite connection is shared by all threads behind a
+    lock, and WAL mode lets several processes read while one writes.
+
+    Modes:
+        on      - read hits from the cache and store new responses
+        refresh - always call the model, overwrite what is stored
+        off     - bypass the cache entirely
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "on",
+        max_age: float = 30 * 24 * 3600,
+        max_bytes: int = 256 * 1024 * 1024,
+        evict_every: int = 100,
+    ):
+        if mode not in CACHE_MODES:
+            raise ValueError(f"Unknown cache mode {mode!r}, expected one of {CACHE_MODES}")
+
+        self.path = path
+        self.mode = mode
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.evict_every = evict_every
+
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(
+        model: str,
+        temperature: float,
+        max_tokens: int,
+        messages,
+        variant: int = 0,
+    ) -> str:
+        """
+        `variant` separates deliberate resamples of the same prompt, such as
+        regenerations after a rejected hook, from the first answer.
+        """
+        messages_hash = hashlib.sha256(
+            json.dumps(messages, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        key = f"{model}|{temperature}|{max_tokens}|{messages_hash}"
+        return f"{key}|v{variant}" if variant else key
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Stored response for `key`, or None. Every hit is counted as
+        llm_cache_hits, whichever completion path asked.
+        """
+        if self.mode != "on":
+            return None
+
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            response, created_at = row
+
+            if self.max_age and now - created_at > self.max_age:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self._conn.commit()
+
+        metrics.increment("llm_cache_hits")
+        return response
+
+    def set(self, key: str, model: str, response: str) -> None:
+        if self.mode == "off":
+            return
+
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, model, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+            self._conn.commit()
+
+            self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self._evict_locked(now)
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict_locked(time.time())
+
+    def _evict_locked(self, now: float) -> None:
+        if self.max_age:
+            self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?",
+                (now - self.max_age,),
+            )
+
+        if self.max_bytes:
+            (total,) = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+
+            if total > self.max_bytes:
+                # Drop least recently used entries until we are back under budget.
+                rows = self._conn.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed_at ASC"
+                )
+                stale = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    stale.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+        self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> ResponseCache:
+    """
+    Return the process-wide response cache, creating it from env on first use.
+
+    LLM_CACHE_PATH       sqlite file (default .cache/llm_responses.sqlite3)
+    LLM_CACHE_MODE       on | refresh | off (default on)
+    LLM_CACHE_MAX_AGE    seconds before an entry expires (default 30 days)
+    LLM_CACHE_MAX_BYTES  total response bytes kept on disk (default 256 MB)
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    path=os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite3"),
+                    mode=os.getenv("LLM_CACHE_MODE", "on").strip().lower(),
+                    max_age=float(os.getenv("LLM_CACHE_MAX_AGE", 30 * 24 * 3600)),
+                    max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", 256 * 1024 * 1024)),
+                )
+
+    return _cache
+
+
+def set_cache_mode(mode: str) -> None:
+    """
+    Switch the shared cache between on, refresh and off at runtime.
+    """
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode {mode!r}, expected one of {CACHE_MODES}")
+    get_cache().mode = mode
+
+
+def cached_completion(fn=None, *, encode=None, decode=None, cache_model=None):
+    """
+    Wrap a complete(messages, model, temperature, max_tokens) style function
+    so that repeated calls are served from the shared response cache.
+
+    Responses that are not strings are stored through `encode` and read
+    back through `decode`. `cache_model(call)` replaces the model name in
+    the key when the answer depends on more than the prompt. A function
+    with an `n` argument returns n choices; choice i is cached as variant i
+    and the cache only answers once every choice is stored. Empty responses
+    are never stored.
+    """
+    if fn is None:
+        return functools.partial(
+            cached_completion,
+            encode=encode,
+            decode=decode,
+            cache_model=cache_model,
+        )
+
+    signature = inspect.signature(fn)
+    encode = encode or (lambda response: response)
+    decode = decode or (lambda stored: stored)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        cache = get_cache()
+
+        if cache.mode == "off":
+            return fn(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        call = bound.arguments
+
+        model = cache_model(call) if cache_model is not None else call["model"]
+        n = call.get("n")
+        variants = range(n) if n is not None else [call.get("variant", 0)]
+
+        keys = [
+            cache.make_key(
+                model,
+                call["temperature"],
+                call["max_tokens"],
+                call["messages"],
+                variant,
+            )
+            for variant in variants
+        ]
+
+        hits = []
+        for key in keys:
+            hit = cache.get(key)
+            if hit is None:
+                break
+            hits.append(decode(hit))
+
+        if len(hits) == len(keys):
+            return hits if n is not None else hits[0]
+
+        response = fn(*args, **kwargs)
+
+        for key, choice in zip(keys, response if n is not None else [response]):
+            if choice:
+                cache.set(key, model, encode(choice))
+
+        return response
+
+    return wrapper
@@ -1,15 +1,6 @@
-import os
-from openai import OpenAI
-from dotenv import load_dotenv
-from typing import Any
+from llm.gateway import chat_complete
 # from google.generativeai.types import HarmBlockThreshold
 # from google.generativeai.types import HarmCategory
-load_dotenv()
-
-client = OpenAI(
-    api_key=os.getenv("TFY_API_KEY"),
-    base_url=os.getenv("TFY_BASE_URL"),
-)
 
 
 # def get_llm_provider_configs(model: str) -> dict[str, Any]:
@@ -42,29 +33,11 @@ def complete_gemini(
     temperature=0.7,
     max_tokens=3500,
 ) -> str:
-    stream = client.chat.completions.create(
+    return chat_complete(
+        messages,
         model=model,
-        messages=messages,
         temperature=temperature,
         max_tokens=max_tokens,
-        extra_headers={
-            "X-TFY-METADATA": "{}",
-            "X-TFY-LOGGING-CONFIG": '{"enabled": true}',
-        },
+        stream=False,
         # **get_llm_provider_configs(model),
     )
-    return stream.choices[0].message.content
-
-   
-    # parts: list[str] = []
-
-    # for chunk in stream:
-    #     if (
-    #         chunk.choices
-    #         and len(chunk.choices) > 0
-    #         and chunk.choices[0].delta
-    #         and chunk.choices[0].delta.content
-    #     ):
-    #         parts.append(chunk.choices[0].delta.content)
-
-    # return "".join(parts).strip()
@@ -0,0 +1,396 @@
+import json
+import os
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+import httpx
+from openai import OpenAI
+from dotenv import load_dotenv
+
+from llm.cache import cached_completion
+from llm.rate_limiter import rate_limited
+from llm.usage import usage_tracker
+from metrics import metrics
+
+# Per-model defaults, addressable by alias or by the full gateway model id.
+#
+# prefix_cache names how the provider reuses a cached prompt prefix:
+#   openai   - automatic, routed by the prompt_cache_key request field
+#   xai      - automatic, routed by the x-grok-conv-id header
+#   implicit - automatic with no request hint (Gemini 2.5)
+#
+# supports_n marks models whose gateway route returns several choices for n=.
+MODELS = {
+    "gpt": {
+        "model": "openai/gpt-4-1-mini",
+        "temperature": 0.7,
+        "max_tokens": 300,
+        "stream": True,
+        "prefix_cache": "openai",
+        "supports_n": True,
+    },
+    "grok": {
+        "model": "xai/grok-4-1-fast-reasoning",
+        "temperature": 0.5,
+        "max_tokens": 300,
+        "stream": False,
+        "prefix_cache": "xai",
+        "supports_n": False,
+    },
+    "gemini": {
+        "model": "google-vertex/gemini-2-5-pro",
+        "temperature": 0.7,
+        "max_tokens": 3500,
+        "stream": False,
+        "prefix_cache": "implicit",
+        "supports_n": False,
+    },
+}
+
+DEFAULT_MODEL = "grok"
+
+TFY_HEADERS = {
+    "X-TFY-METADATA": "{}",
+    "X-TFY-LOGGING-CONFIG": '{"enabled": true}',
+}
+
+_client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OpenAI:
+    """
+    Return the shared gateway client, built on first use.
+
+    All models go through the same TFY gateway, so one OpenAI client with a
+    single keep-alive connection pool serves every model. Retries are left to
+    the rate limiter, so the SDK's own retries are disabled.
+    """
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                load_dotenv()
+
+                pool_size = int(os.getenv("LLM_POOL_SIZE", 32))
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size,
+                        keepalive_expiry=120,
+                    ),
+                    timeout=httpx.Timeout(float(os.getenv("LLM_TIMEOUT", 300)), connect=10.0),
+                )
+
+                _client = OpenAI(
+                    api_key=os.getenv("TFY_API_KEY"),
+                    base_url=os.getenv("TFY_BASE_URL"),
+                    http_client=http_client,
+                    max_retries=0,
+                )
+
+    return _client
+
+
+def resolve_model(model: str) -> dict:
+    """
+    Look up defaults by alias ("grok") or full model id ("xai/grok-4-1-fast-reasoning").
+    Unknown model ids get the defaults of DEFAULT_MODEL.
+    """
+    if model in MODELS:
+        return MODELS[model]
+
+    for config in MODELS.values():
+        if config["model"] == model:
+            return config
+
+    return {**MODELS[DEFAULT_MODEL], "model": model}
+
+
+def _prefix_cache_hints(model: str, prompt_cache_key: Optional[str]) -> dict:
+    """
+    Request arguments that steer calls sharing a static prompt prefix onto
+    the same provider cache.
+    """
+    if not prompt_cache_key:
+        return {}
+
+    provider = resolve_model(model).get("prefix_cache")
+
+    if provider == "openai":
+        return {"extra_body": {"prompt_cache_key": prompt_cache_key}}
+
+    if provider == "xai":
+        return {"extra_headers": {**TFY_HEADERS, "x-grok-conv-id": prompt_cache_key}}
+
+    return {}
+
+
+def _request_args(
+    messages,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    prompt_cache_key: Optional[str] = None,
+    **extra,
+) -> dict:
+    return {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "extra_headers": TFY_HEADERS,
+        **extra,
+        **_prefix_cache_hints(model, prompt_cache_key),
+    }
+
+
+def _read_stream(stream, model: str) -> str:
+    parts: list[str] = []
+
+    for chunk in stream:
+        if getattr(chunk, "usage", None):
+            usage_tracker.record(model, chunk.usage)
+
+        if (
+            chunk.choices
+            and len(chunk.choices) > 0
+            and chunk.choices[0].delta
+            and chunk.choices[0].delta.content
+        ):
+            parts.append(chunk.choices[0].delta.content)
+
+    return "".join(parts).strip()
+
+
+@cached_completion
+@rate_limited
+def _chat(
+    messages,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    stream: bool = False,
+    prompt_cache_key: Optional[str] = None,
+    variant: int = 0,
+) -> str:
+    request = _request_args(
+        messages, model, temperature, max_tokens, prompt_cache_key, stream=stream
+    )
+
+    if stream:
+        request["stream_options"] = {"include_usage": True}
+
+    with metrics.llm_call(model):
+        response = get_client().chat.completions.create(**request)
+
+        if stream:
+            return _read_stream(response, model)
+
+    usage_tracker.record(model, getattr(response, "usage", None))
+
+    return response.choices[0].message.content
+
+
+def chat_complete(
+    messages,
+    model: str = DEFAULT_MODEL,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    stream: Optional[bool] = None,
+    prompt_cache_key: Optional[str] = None,
+    variant: int = 0,
+) -> str:
+    """
+    Run a chat completion on any gateway model, filling unset parameters
+    from that model's defaults.
+
+    Pass `prompt_cache_key` when the messages start with a static prefix
+    shared across calls, so the provider can serve it from its prompt cache.
+    A non-zero `variant` asks for a fresh sample instead of the cached answer.
+    """
+    config = resolve_model(model)
+
+    return _chat(
+        messages,
+        model=config["model"],
+        temperature=config["temperature"] if temperature is None else temperature,
+        max_tokens=config["max_tokens"] if max_tokens is None else max_tokens,
+        stream=config["stream"] if stream is None else stream,
+        prompt_cache_key=prompt_cache_key,
+        variant=variant,
+    )
+
+
+@cached_completion
+@rate_limited
+def _chat_n(
+    messages,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    n: int,
+    prompt_cache_key: Optional[str] = None,
+) -> List[str]:
+    with metrics.llm_call(model):
+        response = get_client().chat.completions.create(
+            **_request_args(messages, model, temperature, max_tokens, prompt_cache_key, n=n)
+        )
+
+    usage_tracker.record(model, getattr(response, "usage", None))
+
+    return [choice.message.content or "" for choice in response.choices]
+
+
+def chat_complete_n(
+    messages,
+    n: int,
+    model: str = DEFAULT_MODEL,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    prompt_cache_key: Optional[str] = None,
+) -> List[str]:
+    """
+    Sample `n` completions of the same messages in a single request.
+
+    Only valid for models with supports_n. Choice i is cached as variant i,
+    so it lines up with what chat_complete(..., variant=i) would return.
+    """
+    config = resolve_model(model)
+    if not config.get("supports_n"):
+        raise ValueError(f"{config['model']} does not support n= sampling")
+
+    return _chat_n(
+        messages,
+        model=config["model"],
+        temperature=config["temperature"] if temperature is None else temperature,
+        max_tokens=config["max_tokens"] if max_tokens is None else max_tokens,
+        n=n,
+        prompt_cache_key=prompt_cache_key,
+    )
+
+
+class StreamResult(NamedTuple):
+    text: str
+    truncated: bool
+
+    def __bool__(self) -> bool:
+        # Only results with text are worth caching or accepting.
+        return bool(self.text)
+
+
+class RequestCancelled(Exception):
+    """Raised by a streaming request whose `cancel` event was set."""
+
+
+def _stream_cache_model(call: dict) -> str:
+    # Guarded results are cached apart from unguarded ones because they
+    # differ for the same prompt.
+    guard = call["guard"]
+    return f"{call['model']}#{type(guard).__name__}" if guard is not None else call["model"]
+
+
+@cached_completion(
+    encode=lambda result: json.dumps(result._asdict(), ensure_ascii=False),
+    decode=lambda stored: StreamResult(**json.loads(stored)),
+    cache_model=_stream_cache_model,
+)
+@rate_limited
+def _stream(
+    messages,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+    guard=None,
+    prompt_cache_key: Optional[str] = None,
+    variant: int = 0,
+    cancel: Optional[threading.Event] = None,
+) -> StreamResult:
+    if cancel is not None and cancel.is_set():
+        raise RequestCancelled()
+
+    started = time.perf_counter()
+    stream = get_client().chat.completions.create(
+        **_request_args(
+            messages,
+            model,
+            temperature,
+            max_tokens,
+            prompt_cache_key,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+    )
+
+    text = ""
+    truncated = False
+
+    try:
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                raise RequestCancelled()
+
+            if getattr(chunk, "usage", None):
+                usage_tracker.record(model, chunk.usage)
+
+            if not (chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content):
+                continue
+
+            text += chunk.choices[0].delta.content
+
+            if guard is not None:
+                stop_at = guard.check(text)
+                if stop_at is not None:
+                    text = text[:stop_at]
+                    truncated = True
+                    # Counted here so cache hits do not count again.
+                    metrics.increment("truncated_streams")
+                    break
+    finally:
+        stream.close()
+        metrics.observe_llm(model, time.perf_counter() - started)
+
+    if guard is not None:
+        text = guard.finalize(text)
+
+    return StreamResult(text.strip(), truncated)
+
+
+def stream_complete(
+    messages,
+    model: str = DEFAULT_MODEL,
+    guard=None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    prompt_cache_key: Optional[str] = None,
+    variant: int = 0,
+    cancel: Optional[threading.Event] = None,
+) -> StreamResult:
+    """
+    Stream a completion from any model and stop as soon as `guard` says so.
+
+    `guard.check(text)` sees the text received so far and returns the
+    length to keep when the stream should end, or None to keep reading;
+    `guard.finalize(text)` cleans up the kept text. Closing the stream early
+    saves the wait for, and on most providers the cost of, tokens that
+    would be thrown away. Guarded results are cached apart from unguarded
+    ones because they differ for the same prompt.
+
+    Setting `cancel` closes the stream at the next chunk (or skips the
+    request if it has not started) and raises RequestCancelled; nothing is
+    cached for a cancelled request.
+    """
+    config = resolve_model(model)
+
+    return _stream(
+        messages,
+        model=config["model"],
+        temperature=config["temperature"] if temperature is None else temperature,
+        max_tokens=config["max_tokens"] if max_tokens is None else max_tokens,
+        guard=guard,
+        prompt_cache_key=prompt_cache_key,
+        variant=variant,
+        cancel=cancel,
+    )
@@ -0,0 +1,225 @@
+import functools
+import inspect
+import os
+import random
+import threading
+import time
+from typing import Callable, Optional
+
+import openai
+
+from metrics import metrics
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` units refill per second up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> None:
+        # A single request larger than the bucket would never fit, so it is
+        # allowed through once the bucket is full.
+        amount = min(amount, self.capacity)
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate,
+                )
+                self._updated = now
+
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+
+                wait_for = (amount - self._tokens) / self.rate
+
+            time.sleep(wait_for)
+
+
+class AdaptiveLimiter:
+    """
+    Rate limiter shared by every LLM client.
+
+    Requests pass a requests-per-second bucket and a tokens-per-minute bucket,
+    then take a concurrency slot. The number of slots follows AIMD: it is
+    halved on 429/5xx responses and grows by roughly one slot per window of
+    successful calls that finish under `target_latency`. Retryable failures
+    are retried with full-jitter exponential backoff, honouring Retry-After
+    when the gateway sends it.
+    """
+
+    def __init__(
+        self,
+        max_rps: float = 10.0,
+        max_tpm: float = 400_000,
+        initial_concurrency: int = 5,
+        min_concurrency: int = 1,
+        max_concurrency: int = 16,
+        target_latency: float = 20.0,
+        max_retries: int = 5,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self.requests = TokenBucket(max_rps, max(1.0, max_rps))
+        self.tokens = TokenBucket(max_tpm / 60.0, max_tpm)
+
+        self.limit = float(initial_concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.target_latency = target_latency
+
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+        self._in_flight = 0
+        self._slots = threading.Condition()
+
+    def _acquire_slot(self) -> None:
+        with self._slots:
+            while self._in_flight >= int(self.limit):
+                self._slots.wait()
+            self._in_flight += 1
+
+    def _release_slot(self) -> None:
+        with self._slots:
+            self._in_flight -= 1
+            self._slots.notify_all()
+
+    def _on_success(self, latency: float) -> None:
+        with self._slots:
+            if latency <= self.target_latency:
+                self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            else:
+                self.limit = max(self.min_concurrency, self.limit * 0.9)
+            self._slots.notify_all()
+
+    def _on_overload(self) -> None:
+        with self._slots:
+            self.limit = max(self.min_concurrency, self.limit / 2)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after)
+        ceiling = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def call(self, fn: Callable, *args, estimated_tokens: int = 0, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.requests.acquire()
+            if estimated_tokens:
+                self.tokens.acquire(estimated_tokens)
+
+            self._acquire_slot()
+            started = time.monotonic()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                self._on_overload()
+                metrics.increment("llm_retries")
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                print(f"LLM call failed ({e.__class__.__name__}), retrying in {delay:.1f}s")
+            else:
+                self._on_success(time.monotonic() - started)
+                return result
+            finally:
+                self._release_slot()
+
+            time.sleep(delay)
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def estimate_tokens(messages, max_tokens: int) -> int:
+    """
+    Rough prompt + completion token estimate used for the TPM budget.
+    """
+    chars = sum(len(str(m.get("content", ""))) for m in messages)
+    return chars // 3 + max_tokens
+
+
+_limiter: Optional[AdaptiveLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter() -> AdaptiveLimiter:
+    """
+    Return the process-wide limiter, configured from env on first use.
+
+    LLM_MAX_RPS, LLM_MAX_TPM, LLM_INITIAL_CONCURRENCY, LLM_MAX_CONCURRENCY,
+    LLM_TARGET_LATENCY (seconds), LLM_MAX_RETRIES
+    """
+    global _limiter
+
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = AdaptiveLimiter(
+                    max_rps=float(os.getenv("LLM_MAX_RPS", 10)),
+                    max_tpm=float(os.getenv("LLM_MAX_TPM", 400_000)),
+                    initial_concurrency=int(os.getenv("LLM_INITIAL_CONCURRENCY", 5)),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", 16)),
+                    target_latency=float(os.getenv("LLM_TARGET_LATENCY", 20)),
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", 5)),
+                )
+
+    return _limiter
+
+
+def rate_limited(fn):
+    """
+    Route a complete(messages, model, temperature, max_tokens) style
+    function through the shared adaptive limiter. An `n` argument asks for
+    n completions, so it multiplies the completion token estimate.
+    """
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        call = bound.arguments
+
+        return get_limiter().call(
+            fn,
+            *args,
+            estimated_tokens=estimate_tokens(
+                call["messages"],
+                call["max_tokens"] * (call.get("n") or 1),
+            ),
+            **kwargs,
+        )
+
+    return wrapper
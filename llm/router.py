@@ -0,0 +1,312 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+from llm.gateway import RequestCancelled, resolve_model
+from metrics import metrics
+
+T = TypeVar("T")
+
+# Model aliases that route each request across several models instead of
+# calling one. LLM_ROUTE_AUTO overrides the "auto" route, e.g. "grok,gemini".
+ROUTES = {
+    "auto": ("grok", "gpt", "gemini"),
+}
+
+
+class AnyEvent:
+    """Read-only event that counts as set once any of `events` is set."""
+
+    def __init__(self, *events: threading.Event):
+        self.events = events
+
+    def is_set(self) -> bool:
+        return any(event.is_set() for event in self.events)
+
+
+def any_event(*events: Optional[threading.Event]):
+    """
+    Combine cancel events, e.g. a caller's and a route's, into one that
+    request functions can check. Returns None when none are given.
+    """
+    events = tuple(event for event in events if event is not None)
+    if not events:
+        return None
+    return events[0] if len(events) == 1 else AnyEvent(*events)
+
+
+class CircuitOpenError(RuntimeError):
+    """Every model of a route is failing and has its circuit open."""
+
+
+class CircuitBreaker:
+    """
+    Per-model circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    the model is skipped for `reset_timeout` seconds. Then a single trial
+    request is let through; its success closes the circuit, its failure
+    opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self._opened_at is not None
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def release(self) -> None:
+        """Give back a trial slot whose request was cancelled."""
+        with self._lock:
+            self._trial = False
+
+    def settle(self, future: Future) -> None:
+        """
+        Record the outcome of a request the router stopped waiting for, so
+        a losing trial request does not hold the trial slot forever.
+        """
+        if future.cancelled():
+            self.release()
+            return
+
+        error = future.exception()
+        if error is None:
+            self.record_success()
+        elif isinstance(error, RequestCancelled):
+            self.release()
+        else:
+            self.record_failure()
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            reopen = self._trial
+            self._trial = False
+
+            if reopen or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    print(f"⚠ Circuit opened for {self.name} after {self._failures} failures")
+                    metrics.increment("circuit_opened")
+                self._opened_at = time.monotonic()
+
+
+class ModelRouter:
+    """
+    Runs one logical request against an ordered list of models.
+
+    The request goes to the first model whose circuit is closed. If it has
+    not answered after the `hedge_quantile` latency of that model (or
+    `hedge_delay` until `hedge_min_samples` calls have been timed), one
+    hedged duplicate is sent to the next model, or to the same one with
+    `hedge_same_model`. The first acceptable answer wins and the other
+    request is cancelled. Errors fail over to the next model at once, and
+    each model's failures feed its circuit breaker.
+    """
+
+    def __init__(
+        self,
+        models: Sequence[str],
+        hedge_quantile: float = 0.95,
+        hedge_delay: float = 20.0,
+        hedge_min_samples: int = 20,
+        hedge_same_model: bool = False,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        max_workers: int = 64,
+    ):
+        if not models:
+            raise ValueError("A route needs at least one model")
+
+        self.models = list(models)
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay = hedge_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_same_model = hedge_same_model
+
+        self.breakers = {
+            model: CircuitBreaker(model, failure_threshold, reset_timeout)
+            for model in self.models
+        }
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route")
+
+    def hedge_after(self, model: str) -> float:
+        """Seconds to wait on `model` before sending a hedged request."""
+        count, latency = metrics.llm_latency(resolve_model(model)["model"], self.hedge_quantile)
+        if count < self.hedge_min_samples or latency <= 0:
+            return self.hedge_delay
+        return latency
+
+    def _next_model(self, tried: List[str]) -> Optional[str]:
+        for model in self.models:
+            if model not in tried and self.breakers[model].allow():
+                return model
+        return None
+
+    def call(
+        self,
+        request: Callable[[str, threading.Event], T],
+        accept: Optional[Callable[[T], bool]] = None,
+    ) -> T:
+        """
+        Return the first acceptable `request(model, cancel)` result.
+
+        `request` should stop early and raise RequestCancelled once `cancel`
+        is set. `accept` defaults to truthiness; a rejected answer moves on
+        to the next model like an error does, without counting against it.
+        """
+        accept = accept or bool
+        cancel = threading.Event()
+        pending: Dict[Future, str] = {}
+        tried: List[str] = []
+        hedge: Optional[Future] = None
+        last_error: Optional[Exception] = None
+
+        def launch(model: str) -> Future:
+            if model not in tried:
+                tried.append(model)
+            future = self._executor.submit(request, model, cancel)
+            pending[future] = model
+            return future
+
+        primary = self._next_model(tried)
+        if primary is None:
+            raise CircuitOpenError(f"Circuits open for every model of {', '.join(self.models)}")
+
+        launch(primary)
+        hedge_at: Optional[float] = time.monotonic() + self.hedge_after(primary)
+
+        try:
+            while pending:
+                timeout = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+
+                if not done:
+                    hedge_at = None
+                    model = None if self.hedge_same_model else self._next_model(tried)
+                    model = model or primary
+                    metrics.increment("hedged_requests")
+                    hedge = launch(model)
+                    continue
+
+                for future in done:
+                    model = pending.pop(future)
+                    breaker = self.breakers[model]
+
+                    try:
+                        result = future.result()
+                    except RequestCancelled:
+                        breaker.release()
+                        continue
+                    except Exception as e:
+                        breaker.record_failure()
+                        last_error = e
+                        print(f"⚠ {model} request failed ({e.__class__.__name__}: {e})")
+                    else:
+                        breaker.record_success()
+                        if accept(result):
+                            if future is hedge:
+                                metrics.increment("hedge_wins")
+                            return result
+                        print(f"⚠ {model} returned an unusable answer")
+
+                    if not pending:
+                        fallback = self._next_model(tried)
+                        if fallback is not None:
+                            metrics.increment("llm_failovers")
+                            print(f"Failing over from {model} to {fallback}")
+                            launch(fallback)
+        finally:
+            # Losers still queued never start; streams in flight stop at
+            # their next chunk. Either way their breakers are settled once
+            # they are done.
+            cancel.set()
+            for future, model in pending.items():
+                future.cancel()
+                future.add_done_callback(self.breakers[model].settle)
+
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError(f"No model of {', '.join(self.models)} returned a usable answer")
+
+
+_routers: Dict[str, ModelRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def route_models(model: str) -> Optional[List[str]]:
+    """Models behind a route alias, or None for a plain model."""
+    if model not in ROUTES:
+        return None
+    override = os.getenv(f"LLM_ROUTE_{model.upper()}")
+    if override:
+        return [m.strip() for m in override.split(",") if m.strip()]
+    return list(ROUTES[model])
+
+
+def get_router(model: str) -> Optional[ModelRouter]:
+    """
+    Return the shared router for a route alias, built from env on first
+    use, or None when `model` is a plain model.
+
+    LLM_HEDGE_QUANTILE, LLM_HEDGE_DELAY (seconds), LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_SAME_MODEL, LLM_BREAKER_FAILURES, LLM_BREAKER_RESET (seconds)
+    """
+    models = route_models(model)
+    if models is None:
+        return None
+
+    if model not in _routers:
+        with _routers_lock:
+            if model not in _routers:
+                _routers[model] = ModelRouter(
+                    models,
+                    hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", 0.95)),
+                    hedge_delay=float(os.getenv("LLM_HEDGE_DELAY", 20)),
+                    hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20)),
+                    hedge_same_model=os.getenv("LLM_HEDGE_SAME_MODEL", "0") == "1",
+                    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", 5)),
+                    reset_timeout=float(os.getenv("LLM_BREAKER_RESET", 60)),
+                )
+
+    return _routers[model]
+
+
+def routed(
+    model: str,
+    request: Callable[[str, Optional[threading.Event]], T],
+    accept: Optional[Callable[[T], bool]] = None,
+) -> T:
+    """
+    Call `request(model, cancel)` through the router when `model` is a
+    route alias, or directly (with no cancel event) otherwise.
+    """
+    router = get_router(model)
+    if router is None:
+        return request(model, None)
+    return router.call(request, accept)
@@ -0,0 +1,52 @@
+import threading
+from collections import defaultdict
+from typing import Dict
+
+
+def _cached_tokens(usage) -> int:
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None) if details is not None else None
+    if cached is None:
+        # Some gateways report prefix-cache hits under the Anthropic-style name.
+        cached = getattr(usage, "cache_read_input_tokens", None)
+    return cached or 0
+
+
+class UsageTracker:
+    """
+    Thread-safe running totals of token usage reported by the gateway, per model.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"calls": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+        )
+
+    def record(self, model: str, usage) -> None:
+        if usage is None:
+            return
+
+        with self._lock:
+            totals = self._totals[model]
+            totals["calls"] += 1
+            totals["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+            totals["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+            totals["cached_tokens"] += _cached_tokens(usage)
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {model: dict(totals) for model, totals in self._totals.items()}
+
+    def report(self) -> None:
+        for model, totals in self.summary().items():
+            prompt = totals["prompt_tokens"]
+            share = totals["cached_tokens"] / prompt if prompt else 0.0
+            print(
+                f"{model}: {totals['calls']} calls, {prompt} prompt tokens "
+                f"({totals['cached_tokens']} cached, {share:.0%}), "
+                f"{totals['completion_tokens']} completion tokens"
+            )
+
+
+usage_tracker = UsageTracker()
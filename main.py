@@ -18,68 +18,291 @@
 #         previous_chapter_text = current_chapter_text
 #         chapter_index += 1
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from ingestion.ingest_chapter import ChapterIngestor
+import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from ingestion.async_ingest import AsyncChapterIngestor
+from ingestion.ingest_chapter import HtmlFileIngestor
+from llm.gateway import DEFAULT_MODEL, MODELS
+from llm.router import ROUTES
+from llm.usage import usage_tracker
+from metrics import metrics
+from pipeline.hook_index import HookIndex, text_hash
+from pipeline.journal import HookJournals
+from pipeline.prompt import PROMPT_VERSION
+from pipeline.batch_api import LocalBatchBackend, OpenAIBatchBackend, run_series_batch
+from pipeline.multi_series import read_series_slugs, run_batch
 from pipeline.runner import process_chapter
-import pandas as pd
+from pipeline.sinks import FanoutSink, JsonlSink, OrderedSink, SINK_FORMATS, TimedSink, open_sink
+from pipeline.streaming import FIRST_HOOK_CHAPTER, run_series_pipeline
+from pipeline.windowed import run_windowed_pipeline, window_worker
 
-def hook_worker(series_slug, idx, prev_text, curr_text):
+def hook_worker(series_slug, idx, prev_text, curr_text, model=DEFAULT_MODEL, best_of=1, journals=None, index=None, incremental=False):
     chapter_number = idx + 1
+    chapter_id = f"{series_slug}_chapter_{chapter_number}"
+    journal = journals.for_series(series_slug) if journals is not None else None
+
+    if journal is not None:
+        hook = journal.done_hook(chapter_number, model)
+        if hook is not None:
+            return chapter_number, hook
+
+    if index is not None:
+        prev_hash, curr_hash = text_hash(prev_text), text_hash(curr_text)
+        if incremental:
+            hook = index.get(series_slug, prev_hash, curr_hash, model, PROMPT_VERSION)
+            if hook is not None:
+                metrics.increment("unchanged_boundaries")
+                return chapter_number, hook
+
+    try:
+        hook = process_chapter(
+            chapter_id=chapter_id,
+            previous_chapter_text=prev_text,
+            current_chapter_text=curr_text,
+            model=model,
+            best_of=best_of,
+        )
+    except Exception as e:
+        if journal is not None:
+            journal.record(chapter_number, chapter_id, model, error=str(e))
+        raise
+
+    if journal is not None:
+        journal.record(chapter_number, chapter_id, model, hook=hook)
+
+    if index is not None and hook:
+        index.put(series_slug, prev_hash, curr_hash, model, PROMPT_VERSION, chapter_number, hook)
 
-    hook = process_chapter(
-        chapter_id=f"{series_slug}_chapter_{chapter_number}",
-        previous_chapter_text=prev_text,
-        current_chapter_text=curr_text,
-    )
     return chapter_number, hook
 
-def main():
-    series_slug = "wxljcrzqxhlj"
-    # series_slug = "6cpqfrtqn8dk"
-    ingestor = ChapterIngestor()
+def window_hook_worker(series_slug, first_chapter_number, chapters, model=DEFAULT_MODEL, journals=None, index=None, incremental=False):
+    journal = journals.for_series(series_slug) if journals is not None else None
+    return window_worker(series_slug, first_chapter_number, chapters, model, journal, index, incremental)
+
+def open_series_sink(series_slug, model=DEFAULT_MODEL, formats=("xlsx",), first_chapter=FIRST_HOOK_CHAPTER, progress=False):
+    """
+    One chapter-ordered output file per format whose rows start at
+    `first_chapter`, plus, with `progress`, a JSONL in completion order.
+    """
+    outputs = [open_sink(f"{series_slug}_{model.split('/')[-1]}.{fmt}") for fmt in formats]
+    for output in outputs:
+        print(f"Writing results to {output.path}")
+
+    sinks = [OrderedSink(FanoutSink(outputs), first_chapter=first_chapter)]
+    if progress:
+        sinks.insert(0, JsonlSink(f"{series_slug}_hooks.jsonl"))
+
+    return TimedSink(FanoutSink(sinks))
+
+def run_series(series_slug, language="hi", llm_workers=16, ingest_workers=8, model=DEFAULT_MODEL, window=1, best_of=1, journals=None, formats=("xlsx",), ingestor=None, index=None, incremental=False, progress=False):
+    owned = ingestor is None
+    ingestor = ingestor or AsyncChapterIngestor(max_concurrency=ingest_workers)
+
+    try:
+        chapters = ingestor.iter_series_chapters(series_slug, language=language)
+
+        with open_series_sink(series_slug, model, formats, progress=progress) as sink, ThreadPoolExecutor(max_workers=llm_workers) as executor:
+
+            if window > 1:
+                submitted = run_windowed_pipeline(
+                    series_slug,
+                    chapters,
+                    sink.write,
+                    executor,
+                    window_size=window,
+                    model=model,
+                    max_pending=llm_workers,
+                    journal=journals.for_series(series_slug) if journals is not None else None,
+                    on_failure=sink.skip,
+                    index=index,
+                    incremental=incremental,
+                )
+            else:
+                submitted = run_series_pipeline(
+                    series_slug,
+                    chapters,
+                    functools.partial(
+                        hook_worker,
+                        model=model,
+                        best_of=best_of,
+                        journals=journals,
+                        index=index,
+                        incremental=incremental,
+                    ),
+                    sink.write,
+                    executor,
+                    max_pending=llm_workers * 2,
+                    on_failure=sink.skip,
+                )
+
+        if submitted == 0:
+            print("Not enough chapters to generate hooks")
+            return
+
+        usage_tracker.report()
+    finally:
+        if owned:
+            ingestor.close()
 
-    chapters = list(
-        ingestor.iter_series_chapters(series_slug, language="hi")
+def run_series_batch_api(series_slug, language="hi", ingest_workers=8, model=DEFAULT_MODEL, local=False, journals=None, formats=("xlsx",), ingestor=None, progress=False):
+    owned = ingestor is None
+    ingestor = ingestor or AsyncChapterIngestor(max_concurrency=ingest_workers)
+
+    try:
+        backend = LocalBatchBackend() if local else OpenAIBatchBackend()
+
+        results = run_series_batch(
+            series_slug,
+            ingestor.iter_series_chapters(series_slug, language=language),
+            backend,
+            model=model,
+            journal=journals.for_series(series_slug) if journals is not None else None,
+        )
+
+        if not results:
+            print("Not enough chapters to generate hooks")
+            return
+
+        with open_series_sink(series_slug, model, formats, progress=progress) as sink:
+            for chapter_number, hook in results:
+                sink.write(chapter_number, hook)
+
+        usage_tracker.report()
+    finally:
+        if owned:
+            ingestor.close()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate end-of-chapter hooks for Pratilipi series.")
+    parser.add_argument("series_slugs", nargs="*", help="series slugs to process")
+    parser.add_argument("--slugs-file", help="file with one series slug per line")
+    parser.add_argument("--language", default="hi")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help=f"model alias ({', '.join([*MODELS, *ROUTES])}) or gateway model id; auto hedges slow calls and fails over across models")
+    parser.add_argument("--llm-workers", type=int, default=16)
+    parser.add_argument("--ingest-workers", type=int, default=8)
+    parser.add_argument("--max-active-series", type=int, default=8)
+    parser.add_argument("--window", type=int, default=1, help="chapters per request; above 1 generates several hooks per call")
+    parser.add_argument("--best-of", type=int, default=1, help="sample N hook candidates in parallel and keep the best")
+    parser.add_argument(
+        "--output-format",
+        default="xlsx",
+        help=f"comma-separated result formats ({', '.join(SINK_FORMATS)}); parquet needs pyarrow",
     )
-    # chapters =fetch_chapters_from_html_file(
-    #     "orqd3inphyvb.html"
-    # )
-    if len(chapters) < 2:
-        print("Not enough chapters to generate hooks")
-        return
+    parser.add_argument("--html-export", help="read series from local HTML exports instead of the API, e.g. exports/{series_slug}.html")
+    parser.add_argument("--metrics", metavar="PREFIX", help="write PREFIX.json and PREFIX.prom with stage timings and usage")
+    parser.add_argument("--progress", action="store_true", help="also write {series_slug}_hooks.jsonl as hooks finish, in completion order")
+    parser.add_argument("--incremental", action="store_true", help="reuse indexed hooks for chapter boundaries whose text has not changed")
+    parser.add_argument("--resume", action="store_true", help="skip chapters already recorded in the run journal")
+    parser.add_argument("--journal-dir", default="journals", help="directory for per-series run journals")
+    parser.add_argument("--batch-api", action="store_true", help="submit each series as one offline batch job")
+    parser.add_argument("--local-batch", action="store_true", help="run the batch flow locally, answering each request through the interactive gateway (implies --batch-api)")
+    return parser.parse_args()
+
+def main():
+    # Settings are read lazily all over (LLM_*, HOOK_*), so .env has to be
+    # loaded before anything runs, not only when the gateway client is built.
+    load_dotenv()
+    args = parse_args()
+
+    series_slugs = list(args.series_slugs)
+    if args.slugs_file:
+        series_slugs.extend(read_series_slugs(args.slugs_file))
+    if not series_slugs:
+        series_slugs = ["wxljcrzqxhlj"]
+        # series_slugs = ["6cpqfrtqn8dk"]
+
+    args.formats = [fmt.strip().lower() for fmt in args.output_format.split(",") if fmt.strip()]
+    unknown = [fmt for fmt in args.formats if fmt not in SINK_FORMATS]
+    if unknown:
+        raise SystemExit(f"Unknown output format(s): {', '.join(unknown)}")
+
+    if (args.batch_api or args.local_batch) and args.model in ROUTES:
+        raise SystemExit(f"--batch-api needs a single model, not the {args.model} route")
+    if (args.batch_api or args.local_batch) and args.incremental:
+        raise SystemExit("--incremental is not supported with --batch-api or --local-batch")
 
-    chapter_pairs = [
-        (i, chapters[i - 1], chapters[i])
-        for i in range(1, len(chapters))
-    ]
+    journals = HookJournals(args.journal_dir, resume=args.resume)
+    index = HookIndex()
 
-    results = []
+    try:
+        run(args, series_slugs, journals, index)
+    finally:
+        journals.close()
+        index.close()
+        metrics.print_summary()
+        if args.metrics:
+            metrics.write(args.metrics)
 
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [
-            executor.submit(
-                hook_worker,
+def run(args, series_slugs, journals, index):
+    ingestor = HtmlFileIngestor(args.html_export) if args.html_export else None
+
+    if args.batch_api or args.local_batch:
+        for series_slug in series_slugs:
+            run_series_batch_api(
                 series_slug,
-                idx,
-                prev_text,
-                curr_text,
+                language=args.language,
+                ingest_workers=args.ingest_workers,
+                model=args.model,
+                local=args.local_batch,
+                journals=journals,
+                formats=args.formats,
+                ingestor=ingestor,
+                progress=args.progress,
             )
-            for idx, prev_text, curr_text in chapter_pairs
-        ]
+        return
 
-        for future in as_completed(futures):
-            try:
-                results.append(future.result())
-            except Exception as e:
-                print(f"Hook generation failed: {e}")
+    if len(series_slugs) == 1:
+        run_series(
+            series_slugs[0],
+            language=args.language,
+            llm_workers=args.llm_workers,
+            ingest_workers=args.ingest_workers,
+            model=args.model,
+            window=args.window,
+            best_of=args.best_of,
+            journals=journals,
+            formats=args.formats,
+            ingestor=ingestor,
+            index=index,
+            incremental=args.incremental,
+            progress=args.progress,
+        )
+        return
 
-    results.sort(key=lambda x: x[0])
+    if args.window > 1:
+        worker = functools.partial(
+            window_hook_worker,
+            model=args.model,
+            journals=journals,
+            index=index,
+            incremental=args.incremental,
+        )
+    else:
+        worker = functools.partial(
+            hook_worker,
+            model=args.model,
+            best_of=args.best_of,
+            journals=journals,
+            index=index,
+            incremental=args.incremental,
+        )
 
-    df = pd.DataFrame(results, columns=["chapter_number", "hook"])
-    output_file = f"{series_slug}_grok.xlsx"
-    df.to_excel(output_file, index=False)
+    written = run_batch(
+        series_slugs,
+        worker,
+        sink_factory=lambda slug: open_series_sink(slug, args.model, args.formats, progress=args.progress),
+        language=args.language,
+        ingest_workers=args.ingest_workers,
+        llm_workers=args.llm_workers,
+        max_active_series=args.max_active_series,
+        ingestor=ingestor,
+        window=args.window,
+    )
 
-    print(f"Results stored in Excel sheet: {output_file}")
+    print(f"Generated {sum(written.values())} hooks across {len(written)} series")
+    usage_tracker.report()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,270 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+
+from llm.usage import usage_tracker
+
+# Upper bounds in seconds, wide enough for both an HTTP fetch and a slow
+# reasoning model.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+STAGES = (
+    "series_listing",
+    "chapter_fetch",
+    "cleaning",
+    "prompt_build",
+    "llm_call",
+    "validation",
+    "regeneration",
+    "export",
+)
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram in the Prometheus layout, with
+    quantiles estimated by interpolating inside the matching bucket.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                low = self.buckets[i - 1] if i > 0 else 0.0
+                high = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(self.max, low + (high - low) * (rank - seen) / count)
+            seen += count
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_s": round(self.sum, 4),
+            "mean_s": round(self.sum / self.count, 4) if self.count else 0.0,
+            "p50_s": round(self.quantile(0.50), 4),
+            "p95_s": round(self.quantile(0.95), 4),
+            "p99_s": round(self.quantile(0.99), 4),
+            "max_s": round(self.max, 4),
+        }
+
+
+def _load_prices() -> Dict[str, Dict[str, float]]:
+    """
+    LLM_PRICES: JSON of {model_id: {"prompt": usd, "cached": usd,
+    "completion": usd}} per million tokens. Cost is only reported for
+    models listed there.
+    """
+    raw = os.getenv("LLM_PRICES")
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except json.JSONDecodeError:
+        print("⚠ LLM_PRICES is not valid JSON, cost will not be reported")
+        return {}
+
+
+class Metrics:
+    """
+    Process-wide run metrics: wall time per pipeline stage, LLM latency per
+    model, event counters and, through usage_tracker, token usage.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = defaultdict(Histogram)
+        self._models: Dict[str, Histogram] = defaultdict(Histogram)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._started = time.time()
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self._stages[stage].observe(seconds)
+
+    def observe_llm(self, model: str, seconds: float) -> None:
+        with self._lock:
+            self._stages["llm_call"].observe(seconds)
+            self._models[model].observe(seconds)
+
+    def llm_latency(self, model: str, q: float) -> Tuple[int, float]:
+        """
+        Number of calls observed for `model` and the `q` quantile of their
+        latency, for callers that adapt to how the model is behaving.
+        """
+        with self._lock:
+            hist = self._models.get(model)
+            return (hist.count, hist.quantile(q)) if hist is not None else (0, 0.0)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    @contextmanager
+    def llm_call(self, model: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_llm(model, time.perf_counter() - started)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._models.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+    def _usage_with_cost(self) -> Dict[str, dict]:
+        prices = _load_prices()
+        usage = usage_tracker.summary()
+
+        for model, totals in usage.items():
+            price = prices.get(model)
+            if not price:
+                continue
+            uncached = totals["prompt_tokens"] - totals["cached_tokens"]
+            cost = (
+                uncached * price.get("prompt", 0.0)
+                + totals["cached_tokens"] * price.get("cached", price.get("prompt", 0.0))
+                + totals["completion_tokens"] * price.get("completion", 0.0)
+            ) / 1_000_000
+            totals["cost_usd"] = round(cost, 6)
+
+        return usage
+
+    def report(self) -> dict:
+        with self._lock:
+            stages = {name: hist.summary() for name, hist in self._stages.items()}
+            models = {name: hist.summary() for name, hist in self._models.items()}
+            counters = dict(self._counters)
+
+        return {
+            "started_at": self._started,
+            "wall_time_s": round(time.time() - self._started, 3),
+            "stages": stages,
+            "llm_latency": models,
+            "counters": counters,
+            "usage": self._usage_with_cost(),
+        }
+
+    def prometheus(self) -> str:
+        """
+        The same data in Prometheus text exposition format.
+        """
+        lines: List[str] = []
+
+        def histogram(name: str, label: str, hists: Dict[str, Histogram], help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, hist in sorted(hists.items()):
+                cumulative = 0
+                for bound, count in zip(hist.buckets, hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{label}="{key}",le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{label}="{key}",le="+Inf"}} {hist.count}')
+                lines.append(f'{name}_sum{{{label}="{key}"}} {hist.sum:.6f}')
+                lines.append(f'{name}_count{{{label}="{key}"}} {hist.count}')
+
+        with self._lock:
+            histogram("hookgen_stage_seconds", "stage", self._stages, "Wall time spent per pipeline stage.")
+            histogram("hookgen_llm_latency_seconds", "model", self._models, "LLM request latency per model.")
+
+            lines.append("# HELP hookgen_events_total Pipeline event counters.")
+            lines.append("# TYPE hookgen_events_total counter")
+            for name, value in sorted(self._counters.items()):
+                lines.append(f'hookgen_events_total{{event="{name}"}} {value}')
+
+        usage = self._usage_with_cost()
+        for field in ("calls", "prompt_tokens", "cached_tokens", "completion_tokens"):
+            lines.append(f"# TYPE hookgen_llm_{field}_total counter")
+            for model, totals in sorted(usage.items()):
+                lines.append(f'hookgen_llm_{field}_total{{model="{model}"}} {totals[field]}')
+
+        costed = {model: totals["cost_usd"] for model, totals in usage.items() if "cost_usd" in totals}
+        if costed:
+            lines.append("# TYPE hookgen_llm_cost_usd_total counter")
+            for model, cost in sorted(costed.items()):
+                lines.append(f'hookgen_llm_cost_usd_total{{model="{model}"}} {cost}')
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, prefix: str) -> None:
+        """
+        Write `{prefix}.json` and `{prefix}.prom`.
+        """
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with open(f"{prefix}.json", "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+
+        with open(f"{prefix}.prom", "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+
+        print(f"Metrics written to {prefix}.json and {prefix}.prom")
+
+    def print_summary(self) -> None:
+        report = self.report()
+        for name in STAGES:
+            stats = report["stages"].get(name)
+            if stats:
+                print(
+                    f"{name}: {stats['count']} x, total {stats['total_s']:.2f}s, "
+                    f"p50 {stats['p50_s']:.2f}s, p95 {stats['p95_s']:.2f}s"
+                )
+        for model, stats in report["llm_latency"].items():
+            print(
+                f"{model} latency: p50 {stats['p50_s']:.2f}s, p95 {stats['p95_s']:.2f}s, "
+                f"p99 {stats['p99_s']:.2f}s over {stats['count']} calls"
+            )
+        for model, totals in report["usage"].items():
+            if "cost_usd" in totals:
+                print(f"{model}: ${totals['cost_usd']:.4f}")
+
+
+metrics = Metrics()
+
+
+def timed(stage: str):
+    """
+    Decorator form of metrics.stage().
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with metrics.stage(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,289 @@
+import json
+import os
+import time
+import uuid
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from llm.gateway import DEFAULT_MODEL, chat_complete, get_client, resolve_model
+from pipeline.budget import prepare_chapter_inputs
+from pipeline.journal import HookJournal
+from pipeline.prompt import build_hook_messages
+from pipeline.runner import process_chapter
+from pipeline.streaming import iter_chapter_pairs
+from pipeline.validator import validate_hook
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_request(
+    custom_id: str,
+    previous_chapter_text: str,
+    current_chapter_text: str,
+    model: str = DEFAULT_MODEL,
+) -> dict:
+    """
+    One line of an OpenAI batch input file for a chapter pair.
+    """
+    config = resolve_model(model)
+    previous, current = prepare_chapter_inputs(previous_chapter_text, current_chapter_text)
+
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": {
+            "model": config["model"],
+            "messages": build_hook_messages(previous, current),
+            "temperature": config["temperature"],
+            "max_tokens": config["max_tokens"],
+        },
+    }
+
+
+def _custom_id(series_slug: str, chapter_number: int) -> str:
+    return f"{series_slug}:{chapter_number}"
+
+
+def _chapter_number(custom_id: str) -> int:
+    return int(custom_id.rsplit(":", 1)[1])
+
+
+def write_batch_file(
+    path: str,
+    series_slug: str,
+    pairs: Iterable[Tuple[int, str, str]],
+    model: str = DEFAULT_MODEL,
+) -> int:
+    """
+    Write one batch request per (idx, previous, current) pair; returns the count.
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for idx, prev_text, curr_text in pairs:
+            request = build_batch_request(
+                _custom_id(series_slug, idx + 1), prev_text, curr_text, model
+            )
+            f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+class OpenAIBatchBackend:
+    """
+    Submit batch files through the gateway's OpenAI-compatible batch API.
+    """
+
+    def __init__(self, client=None, completion_window: str = "24h"):
+        self.client = client or get_client()
+        self.completion_window = completion_window
+
+    def submit(self, input_path: str) -> str:
+        with open(input_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.completion_window,
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        batch = self.client.batches.retrieve(batch_id)
+
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+def complete_batch_body(body: dict) -> str:
+    """
+    Answer one batch request body through the interactive gateway.
+    """
+    return chat_complete(
+        body["messages"],
+        model=body["model"],
+        temperature=body["temperature"],
+        max_tokens=body["max_tokens"],
+    )
+
+
+class LocalBatchBackend:
+    """
+    Local stand-in for the batch API.
+
+    Requests are answered by `responder(body) -> str` when the batch is
+    submitted, and results come back in the OpenAI batch output format. A
+    responder that raises produces an error line for that request. The
+    default responder sends each request through chat_complete, so the
+    hooks are real ones, just not discounted.
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[dict], str]] = None,
+        directory: str = ".cache/local_batches",
+    ):
+        self.responder = responder or complete_batch_body
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def submit(self, input_path: str) -> str:
+        batch_id = f"batch_local_{uuid.uuid4().hex[:12]}"
+        output_path = os.path.join(self.directory, f"{batch_id}.jsonl")
+
+        with open(input_path, "r", encoding="utf-8") as src, \
+                open(output_path, "w", encoding="utf-8") as out:
+            for line in src:
+                if not line.strip():
+                    continue
+                request = json.loads(line)
+                out.write(json.dumps(self._answer(request), ensure_ascii=False) + "\n")
+
+        return batch_id
+
+    def _answer(self, request: dict) -> dict:
+        try:
+            content = self.responder(request["body"])
+        except Exception as e:
+            return {
+                "id": f"req_{uuid.uuid4().hex[:12]}",
+                "custom_id": request["custom_id"],
+                "response": None,
+                "error": {"code": e.__class__.__name__, "message": str(e)},
+            }
+
+        return {
+            "id": f"req_{uuid.uuid4().hex[:12]}",
+            "custom_id": request["custom_id"],
+            "response": {
+                "status_code": 200,
+                "body": {
+                    "model": request["body"].get("model"),
+                    "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": content}}
+                    ],
+                },
+            },
+            "error": None,
+        }
+
+    def status(self, batch_id: str) -> str:
+        return "completed"
+
+    def results(self, batch_id: str) -> Iterator[dict]:
+        with open(os.path.join(self.directory, f"{batch_id}.jsonl"), "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def parse_batch_result(result: dict) -> Tuple[int, Optional[str]]:
+    """
+    Map one batch output line back to (chapter_number, hook or None).
+    """
+    chapter_number = _chapter_number(result["custom_id"])
+    response = result.get("response") or {}
+
+    if result.get("error") or response.get("status_code") != 200:
+        return chapter_number, None
+
+    try:
+        content = response["body"]["choices"][0]["message"]["content"]
+    except (KeyError, IndexError, TypeError):
+        return chapter_number, None
+
+    return chapter_number, (content or "").strip() or None
+
+
+def run_series_batch(
+    series_slug: str,
+    chapters: Iterable[str],
+    backend,
+    model: str = DEFAULT_MODEL,
+    work_dir: str = ".cache/batches",
+    poll_interval: float = 30.0,
+    journal: Optional[HookJournal] = None,
+) -> List[Tuple[int, str]]:
+    """
+    Generate every hook of a series through one batch job.
+
+    Pairs whose batch result is missing, errored or fails validation are
+    regenerated one by one through process_chapter. Pairs already in
+    `journal` are left out of the batch. Returns (chapter_number, hook)
+    sorted by chapter number.
+    """
+    os.makedirs(work_dir, exist_ok=True)
+
+    pairs: Dict[int, Tuple[str, str]] = {}
+    hooks: Dict[int, str] = {}
+
+    def record(chapter_number: int, hook: Optional[str] = None, error: Optional[str] = None) -> None:
+        if journal is not None:
+            journal.record(
+                chapter_number,
+                f"{series_slug}_chapter_{chapter_number}",
+                model,
+                hook=hook,
+                error=error,
+            )
+
+    def remember(pair_iter):
+        for idx, prev_text, curr_text in pair_iter:
+            journaled = journal.done_hook(idx + 1, model) if journal is not None else None
+            if journaled is not None:
+                hooks[idx + 1] = journaled
+                continue
+            pairs[idx + 1] = (prev_text, curr_text)
+            yield idx, prev_text, curr_text
+
+    input_path = os.path.join(work_dir, f"{series_slug}_batch_input.jsonl")
+    count = write_batch_file(input_path, series_slug, remember(iter_chapter_pairs(chapters)), model)
+
+    if count == 0:
+        return sorted(hooks.items())
+
+    batch_id = backend.submit(input_path)
+    print(f"Submitted batch {batch_id} with {count} requests for {series_slug}")
+
+    status = backend.status(batch_id)
+    while status not in TERMINAL_STATUSES:
+        time.sleep(poll_interval)
+        status = backend.status(batch_id)
+
+    print(f"Batch {batch_id} finished with status {status}")
+
+    if status in ("completed", "expired"):
+        for result in backend.results(batch_id):
+            chapter_number, hook = parse_batch_result(result)
+            if hook is not None and chapter_number in pairs and validate_hook(hook, pairs[chapter_number]):
+                hooks[chapter_number] = hook
+                record(chapter_number, hook)
+
+    failed = sorted(set(pairs) - set(hooks))
+    if failed:
+        print(f"Retrying {len(failed)} failed batch items through the interactive path")
+
+    for chapter_number in failed:
+        prev_text, curr_text = pairs[chapter_number]
+        try:
+            hooks[chapter_number] = process_chapter(
+                chapter_id=f"{series_slug}_chapter_{chapter_number}",
+                previous_chapter_text=prev_text,
+                current_chapter_text=curr_text,
+                model=model,
+            )
+        except Exception as e:
+            print(f"Hook generation failed: {e}")
+            record(chapter_number, error=str(e))
+        else:
+            record(chapter_number, hooks[chapter_number])
+
+    return sorted(hooks.items())
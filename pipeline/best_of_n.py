@@ -0,0 +1,113 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional, Tuple
+
+from llm.gateway import DEFAULT_MODEL, chat_complete_n, resolve_model
+from metrics import metrics
+from pipeline.budget import prepare_chapter_inputs
+from pipeline.generator import generate_hook
+from pipeline.prompt import PROMPT_VERSION, build_hook_messages
+from pipeline.stream_guard import HookStreamGuard
+from pipeline.validator import STRONG_SCORE, score_hook
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _candidate_pool() -> ThreadPoolExecutor:
+    """
+    Shared pool for candidate requests, sized by HOOK_CANDIDATE_WORKERS
+    (default 16), so concurrent best-of-N calls queue instead of each
+    starting a pool of their own.
+    """
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=int(os.getenv("HOOK_CANDIDATE_WORKERS", 16)),
+                    thread_name_prefix="candidate",
+                )
+
+    return _pool
+
+
+def _pick(candidates: List[Tuple[float, str]]) -> str:
+    if not candidates:
+        raise RuntimeError("No hook candidates succeeded")
+    return max(candidates, key=lambda c: c[0])[1]
+
+
+def generate_best_hook(
+    previous_chapter_text: str,
+    current_chapter_text: str,
+    n: int = 3,
+    model: str = DEFAULT_MODEL,
+    accept_score: float = STRONG_SCORE,
+) -> str:
+    """
+    Sample `n` hook candidates at once and return the best by local score.
+
+    Models with supports_n get one request with n=, and each choice is
+    cut by HookStreamGuard as a stream would have been. Otherwise the
+    candidates are requested in parallel, and as soon as one scores at
+    least `accept_score` the others are cancelled: queued ones never start
+    and streams in flight close at their next chunk.
+    """
+    sources = (previous_chapter_text, current_chapter_text)
+
+    if resolve_model(model).get("supports_n"):
+        with metrics.stage("prompt_build"):
+            previous, current = prepare_chapter_inputs(previous_chapter_text, current_chapter_text)
+            messages = build_hook_messages(previous, current)
+        choices = chat_complete_n(
+            messages,
+            n=n,
+            model=model,
+            prompt_cache_key=PROMPT_VERSION,
+        )
+        # Whole responses, so the guard cuts them after the fact.
+        guard = HookStreamGuard()
+        hooks = [guard.apply(c) for c in choices if c]
+        return _pick([(score_hook(h, sources), h) for h in hooks if h])
+
+    candidates: List[Tuple[float, str]] = []
+    cancel = threading.Event()
+
+    futures = [
+        _candidate_pool().submit(
+            generate_hook,
+            previous_chapter_text=previous_chapter_text,
+            current_chapter_text=current_chapter_text,
+            model=model,
+            variant=i,
+            cancel=cancel,
+        )
+        for i in range(n)
+    ]
+
+    try:
+        for future in as_completed(futures):
+            try:
+                hook = future.result()
+            except Exception as e:
+                print(f"Hook candidate failed: {e}")
+                continue
+
+            if not hook:
+                continue
+
+            score = score_hook(hook, sources)
+            candidates.append((score, hook))
+
+            if score >= accept_score:
+                break
+    finally:
+        cancel.set()
+        for future in futures:
+            future.cancel()
+
+    return _pick(candidates)
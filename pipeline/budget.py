@@ -0,0 +1,124 @@
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken is optional; fall back to a character heuristic
+    _encoding = None
+
+ELISION = "[…]"
+
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?।॥])\s+|\n+")
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count prompt tokens with tiktoken when available.
+
+    Without it, estimate conservatively: Latin script averages about four
+    characters per token, Devanagari and other Indic scripts closer to two.
+    """
+    if not text:
+        return 0
+
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    other_chars = len(text) - ascii_chars
+    return ascii_chars // 4 + other_chars // 2 + 1
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_BREAK.split(text) if s and s.strip()]
+
+
+def _take(sentences: List[str], max_tokens: int) -> List[str]:
+    taken = []
+    used = 0
+    for sentence in sentences:
+        cost = count_tokens(sentence) + 1
+        if used + cost > max_tokens:
+            break
+        taken.append(sentence)
+        used += cost
+    return taken
+
+
+def head_and_tail(text: str, max_tokens: int, head_share: float) -> str:
+    """
+    Keep whole sentences from the start and the end of `text` within
+    `max_tokens`, dropping the middle.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    sentences = split_sentences(text)
+    head = _take(sentences, int(max_tokens * head_share))
+    tail = _take(
+        list(reversed(sentences[len(head):])),
+        max_tokens - sum(count_tokens(s) + 1 for s in head),
+    )
+    tail.reverse()
+
+    if not head and not tail:
+        # A single enormous sentence: fall back to a character cut.
+        return text[: max_tokens * 2]
+
+    return " ".join(head + [ELISION] + tail)
+
+
+_digests: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+_digests_lock = threading.Lock()
+_DIGEST_CACHE_SIZE = 512
+
+
+def chapter_digest(text: str, max_tokens: int) -> str:
+    """
+    Compact stand-in for a chapter the reader has just finished.
+
+    The hook only needs to know where the story left off, so the digest
+    keeps the opening for orientation and most of the budget for the
+    closing passage. Digests are memoized by content hash, so each chapter
+    is condensed once and reused as the previous chapter of the next pair.
+    """
+    key = (hashlib.sha1(text.encode("utf-8")).hexdigest(), max_tokens)
+
+    with _digests_lock:
+        if key in _digests:
+            _digests.move_to_end(key)
+            return _digests[key]
+
+    digest = head_and_tail(text, max_tokens, head_share=0.2)
+
+    with _digests_lock:
+        _digests[key] = digest
+        while len(_digests) > _DIGEST_CACHE_SIZE:
+            _digests.popitem(last=False)
+
+    return digest
+
+
+def prepare_chapter_inputs(
+    previous_chapter_text: str,
+    current_chapter_text: str,
+) -> Tuple[str, str]:
+    """
+    Fit both chapters into the hook input budget.
+
+    HOOK_INPUT_TOKEN_BUDGET  tokens for both chapters together (default 16000)
+    HOOK_DIGEST_TOKENS       tokens for the previous chapter digest (default 800)
+    """
+    input_budget = int(os.getenv("HOOK_INPUT_TOKEN_BUDGET", 16000))
+    digest_tokens = int(os.getenv("HOOK_DIGEST_TOKENS", 800))
+
+    previous = chapter_digest(previous_chapter_text, digest_tokens)
+    remaining = max(digest_tokens, input_budget - count_tokens(previous))
+    current = head_and_tail(current_chapter_text, remaining, head_share=0.6)
+
+    return previous, current
@@ -0,0 +1,98 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+DEFAULT_INDEX_PATH = ".cache/hook_index.sqlite3"
+
+
+def text_hash(text: str) -> str:
+    """Stable hash of one chapter's cleaned text."""
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class HookIndex:
+    """
+    Persistent index of generated hooks keyed by the texts of the boundary.
+
+    Each hook is stored under (series, previous-chapter hash, current-chapter
+    hash, model, prompt version), so a rerun can tell which boundaries are
+    unchanged since the hook was written and which are new or edited, even
+    when chapters were inserted and the numbering shifted.
+    """
+
+    def __init__(self, path: str = DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS hooks (
+                series_slug TEXT NOT NULL,
+                prev_hash TEXT NOT NULL,
+                curr_hash TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                chapter_number INTEGER NOT NULL,
+                hook TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (series_slug, prev_hash, curr_hash, model, prompt_version)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(
+        self,
+        series_slug: str,
+        prev_hash: str,
+        curr_hash: str,
+        model: str,
+        prompt_version: str,
+    ) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT hook FROM hooks
+                WHERE series_slug = ? AND prev_hash = ? AND curr_hash = ?
+                    AND model = ? AND prompt_version = ?
+                """,
+                (series_slug, prev_hash, curr_hash, model, prompt_version),
+            ).fetchone()
+
+        return row[0] if row is not None else None
+
+    def put(
+        self,
+        series_slug: str,
+        prev_hash: str,
+        curr_hash: str,
+        model: str,
+        prompt_version: str,
+        chapter_number: int,
+        hook: str,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO hooks
+                    (series_slug, prev_hash, curr_hash, model, prompt_version,
+                     chapter_number, hook, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (series_slug, prev_hash, curr_hash, model, prompt_version,
+                 chapter_number, hook, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+
+class HookJournal:
+    """
+    Append-only JSONL record of every chapter's outcome for one series.
+
+    Each record is flushed and fsynced as soon as it is written, so a crash
+    or Ctrl-C loses at most the hooks that were still in flight. Without
+    `resume`, an existing journal is renamed aside with a timestamp suffix
+    rather than overwritten, so a forgotten --resume loses nothing.
+    """
+
+    def __init__(self, path: str, resume: bool = False):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if resume:
+            self.completed: Dict[int, dict] = self._load()
+        else:
+            self.completed = {}
+            self._rotate()
+
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _rotate(self) -> None:
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+
+        rotated = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}"
+        suffix = 1
+        while os.path.exists(rotated):
+            rotated = f"{self.path}.{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+            suffix += 1
+
+        os.replace(self.path, rotated)
+        print(f"Previous journal kept as {rotated}; pass --resume to continue a run instead")
+
+    def _load(self) -> Dict[int, dict]:
+        completed: Dict[int, dict] = {}
+
+        if not os.path.exists(self.path):
+            return completed
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The last line may be cut short by the crash we are resuming from.
+                    continue
+                if record.get("status") == "ok":
+                    completed[record["chapter_number"]] = record
+                else:
+                    completed.pop(record.get("chapter_number"), None)
+
+        return completed
+
+    def done_hook(self, chapter_number: int, model: str) -> Optional[str]:
+        """Journaled hook for a chapter if it was generated with the same model."""
+        record = self.completed.get(chapter_number)
+        if record is not None and record.get("model") == model:
+            return record["hook"]
+        return None
+
+    def record(
+        self,
+        chapter_number: int,
+        chapter_id: str,
+        model: str,
+        hook: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        entry = {
+            "chapter_number": chapter_number,
+            "chapter_id": chapter_id,
+            "model": model,
+            "status": "ok" if error is None else "failed",
+            "hook": hook,
+            "error": error,
+            "ts": time.time(),
+        }
+        line = json.dumps(entry, ensure_ascii=False)
+
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if error is None:
+                self.completed[chapter_number] = entry
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class HookJournals:
+    """
+    Lazily opened journals, one file per series under `directory`.
+    """
+
+    def __init__(self, directory: str = "journals", resume: bool = False):
+        self.directory = directory
+        self.resume = resume
+        self._journals: Dict[str, HookJournal] = {}
+        self._lock = threading.Lock()
+
+    def for_series(self, series_slug: str) -> HookJournal:
+        with self._lock:
+            if series_slug not in self._journals:
+                self._journals[series_slug] = HookJournal(
+                    os.path.join(self.directory, f"{series_slug}.jsonl"),
+                    resume=self.resume,
+                )
+            return self._journals[series_slug]
+
+    def close(self) -> None:
+        with self._lock:
+            for journal in self._journals.values():
+                journal.close()
+            self._journals.clear()
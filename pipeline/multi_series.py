@@ -0,0 +1,210 @@
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from ingestion.async_ingest import AsyncChapterIngestor
+from pipeline.streaming import iter_chapter_pairs
+from pipeline.windowed import iter_chapter_windows
+
+_DONE = object()
+
+
+def read_series_slugs(path: str) -> List[str]:
+    """
+    Read one series slug per line, ignoring blank lines and # comments.
+    """
+    slugs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            slug = line.split("#", 1)[0].strip()
+            if slug:
+                slugs.append(slug)
+    return slugs
+
+
+class SeriesFeed:
+    """
+    Chapter pairs (or windows) of one series, produced on a background
+    thread into a small bounded queue so a slow LLM pool throttles ingestion.
+    """
+
+    def __init__(self, series_slug: str, sink, buffer_size: int):
+        self.series_slug = series_slug
+        self.sink = sink
+        self.pairs: queue.Queue = queue.Queue(maxsize=buffer_size)
+        self.exhausted = False
+        self.in_flight = 0
+        self.stop = threading.Event()
+
+    def _put(self, item) -> bool:
+        while not self.stop.is_set():
+            try:
+                self.pairs.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce(self, ingestor: AsyncChapterIngestor, language: str, window: int = 1) -> None:
+        chapters = ingestor.iter_series_chapters(self.series_slug, language=language)
+        items = iter_chapter_pairs(chapters) if window == 1 else iter_chapter_windows(chapters, window)
+        try:
+            for item in items:
+                if not self._put(item):
+                    return
+        except Exception as e:
+            print(f"Ingestion failed for series {self.series_slug}: {e}")
+        finally:
+            chapters.close()
+        self._put(_DONE)
+
+    def poll(self):
+        try:
+            return self.pairs.get_nowait()
+        except queue.Empty:
+            return None
+
+
+def run_batch(
+    series_slugs: Iterable[str],
+    worker: Callable,
+    sink_factory: Callable[[str], object],
+    language: str = "en",
+    ingest_workers: int = 16,
+    llm_workers: int = 5,
+    max_active_series: int = 8,
+    buffer_per_series: int = 4,
+    ingestor: Optional[AsyncChapterIngestor] = None,
+    window: int = 1,
+) -> Dict[str, int]:
+    """
+    Generate hooks for many series on one shared ingestion pool and one
+    shared LLM pool.
+
+    Up to `max_active_series` series are ingested at once. Their pairs are
+    dispatched round-robin, one per series per turn, so a long series cannot
+    starve the others. The LLM pool is kept at most `llm_workers * 2` pairs
+    deep. `sink_factory(series_slug)` returns a pipeline.sinks.Sink, which
+    gets skip() for every failed chapter and is closed once every hook of
+    that series has finished, or when the run stops early. `ingestor` is
+    left open for the caller; one created here is closed at the end.
+    Returns the number of hooks written per series.
+
+    With `window` above 1 the unit of work is a window of chapters from
+    pipeline.windowed.iter_chapter_windows instead of a pair, and
+    `worker(series_slug, first_chapter_number, chapters)` returns a list of
+    (chapter_number, hook); boundaries it leaves out are skipped.
+    """
+    pending_slugs = deque(series_slugs)
+    owned = ingestor is None
+    ingestor = ingestor or AsyncChapterIngestor(max_concurrency=ingest_workers)
+
+    active: deque = deque()
+    open_feeds: List[SeriesFeed] = []
+    futures: Dict[Future, Tuple[SeriesFeed, range]] = {}
+    written: Dict[str, int] = {}
+    max_in_flight = llm_workers * 2
+
+    producers = ThreadPoolExecutor(max_workers=max_active_series, thread_name_prefix="series-feed")
+    llm_pool = ThreadPoolExecutor(max_workers=llm_workers, thread_name_prefix="llm")
+
+    def activate() -> None:
+        while pending_slugs and len(active) < max_active_series:
+            slug = pending_slugs.popleft()
+            feed = SeriesFeed(slug, sink_factory(slug), buffer_per_series)
+            written[slug] = 0
+            active.append(feed)
+            open_feeds.append(feed)
+            producers.submit(feed.produce, ingestor, language, window)
+
+    def finish_if_complete(feed: SeriesFeed) -> None:
+        if feed.exhausted and feed.in_flight == 0:
+            open_feeds.remove(feed)
+            feed.sink.close()
+            print(f"Finished series {feed.series_slug}: {written[feed.series_slug]} hooks")
+
+    def drain(done: Iterable[Future]) -> None:
+        for future in done:
+            feed, numbers = futures.pop(future)
+            feed.in_flight -= 1
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Hook generation failed for series {feed.series_slug}: {e}")
+                results = []
+            else:
+                results = [result] if window == 1 else result
+
+            for chapter_number, hook in results:
+                feed.sink.write(chapter_number, hook)
+                written[feed.series_slug] += 1
+
+            done_numbers = {chapter_number for chapter_number, _ in results}
+            for chapter_number in numbers:
+                if chapter_number not in done_numbers:
+                    feed.sink.skip(chapter_number)
+
+            finish_if_complete(feed)
+
+    try:
+        activate()
+
+        while active or futures:
+            dispatched = False
+
+            for _ in range(len(active)):
+                if len(futures) >= max_in_flight:
+                    break
+
+                feed = active[0]
+                active.rotate(-1)
+
+                item = feed.poll()
+                if item is None:
+                    continue
+
+                if item is _DONE:
+                    feed.exhausted = True
+                    active.remove(feed)
+                    finish_if_complete(feed)
+                    activate()
+                    continue
+
+                if window == 1:
+                    idx, prev_text, curr_text = item
+                    future = llm_pool.submit(worker, feed.series_slug, idx, prev_text, curr_text)
+                    futures[future] = (feed, range(idx + 1, idx + 2))
+                else:
+                    first_number, chapters = item
+                    future = llm_pool.submit(worker, feed.series_slug, first_number, chapters)
+                    futures[future] = (feed, range(first_number + 1, first_number + len(chapters)))
+                feed.in_flight += 1
+                dispatched = True
+
+            if futures:
+                done, _ = wait(
+                    list(futures),
+                    timeout=0 if dispatched else 0.05,
+                    return_when=FIRST_COMPLETED,
+                )
+                drain(done)
+            elif not dispatched and active:
+                time.sleep(0.05)
+    finally:
+        for feed in active:
+            feed.stop.set()
+        producers.shutdown(wait=False, cancel_futures=True)
+        llm_pool.shutdown(wait=True)
+        # Series cut short by an error still flush and close their outputs.
+        for feed in open_feeds:
+            try:
+                feed.sink.close()
+            except Exception as e:
+                print(f"⚠ Could not close the output of series {feed.series_slug}: {e}")
+        if owned:
+            ingestor.close()
+
+    return written
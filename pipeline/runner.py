@@ -1,26 +1,73 @@
+import os
+
+from llm.gateway import DEFAULT_MODEL
+from metrics import metrics
+from pipeline.best_of_n import generate_best_hook
 from pipeline.generator import generate_hook
-from pipeline.validator import validate_hook
+from pipeline.validator import check_hook
 
 def process_chapter(
     chapter_id: str,
     previous_chapter_text: str,
-    current_chapter_text: str
+    current_chapter_text: str,
+    model: str = DEFAULT_MODEL,
+    max_regenerations: int = None,
+    best_of: int = 1,
 ):
-    print(f"Generating hook for chapter {chapter_id}...")
+    """
+    Generate a hook and regenerate while it fails validation, up to
+    `max_regenerations` extra calls (HOOK_MAX_REGENERATIONS, default 1).
+    If every attempt fails, the attempt breaking the fewest rules is kept.
 
-    hook = generate_hook(
-        previous_chapter_text=previous_chapter_text,
-        current_chapter_text=current_chapter_text
-    )
+    With best_of > 1 the candidates are sampled in parallel instead and the
+    best-scoring one is returned without sequential regeneration.
+    """
+    if max_regenerations is None:
+        max_regenerations = int(os.getenv("HOOK_MAX_REGENERATIONS", 1))
 
-    if not validate_hook(hook):
-        hook = generate_hook(
+    print(f"Generating hook for chapter {chapter_id}...")
+
+    if best_of > 1:
+        return generate_best_hook(
             previous_chapter_text=previous_chapter_text,
-            current_chapter_text=current_chapter_text
+            current_chapter_text=current_chapter_text,
+            n=best_of,
+            model=model,
         )
 
+    sources = (previous_chapter_text, current_chapter_text)
+    best_hook, best_reasons = None, None
+
+    for attempt in range(max_regenerations + 1):
+        if attempt:
+            metrics.increment("regenerations")
+            with metrics.stage("regeneration"):
+                hook = generate_hook(
+                    previous_chapter_text=previous_chapter_text,
+                    current_chapter_text=current_chapter_text,
+                    model=model,
+                    variant=attempt,
+                )
+        else:
+            hook = generate_hook(
+                previous_chapter_text=previous_chapter_text,
+                current_chapter_text=current_chapter_text,
+                model=model,
+                variant=attempt,
+            )
+
+        result = check_hook(hook, sources)
+        if result.ok:
+            return hook
+
+        metrics.increment("rejected_hooks")
+        print(f"Rejected hook for chapter {chapter_id}: {', '.join(result.reasons)}")
+
+        if best_reasons is None or len(result.reasons) < len(best_reasons):
+            best_hook, best_reasons = hook, result.reasons
+
     # out = Path(f"hook_output/new_hooks_english/{chapter_id}.txt")
     # out.parent.mkdir(parents=True, exist_ok=True)
     # out.write_text(hook, encoding="utf-8")
 
-    return hook
+    return best_hook
@@ -0,0 +1,264 @@
+import csv
+import json
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+
+from metrics import metrics
+
+COLUMNS = ("chapter_number", "hook")
+
+
+class Sink(ABC):
+    """
+    Destination for finished hooks: write(chapter_number, hook), skip() for a
+    chapter that produced no hook, and close().
+    """
+
+    @abstractmethod
+    def write(self, chapter_number: int, hook: str) -> None:
+        ...
+
+    def skip(self, chapter_number: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class TimedSink(Sink):
+    """
+    Count the time spent writing to `sink` towards a metrics stage.
+    """
+
+    def __init__(self, sink, stage: str = "export"):
+        self.sink = sink
+        self.stage = stage
+
+    def write(self, chapter_number: int, hook: str) -> None:
+        with metrics.stage(self.stage):
+            self.sink.write(chapter_number, hook)
+
+    def skip(self, chapter_number: int) -> None:
+        self.sink.skip(chapter_number)
+
+    def close(self) -> None:
+        with metrics.stage(self.stage):
+            self.sink.close()
+
+
+class JsonlSink(Sink):
+    """
+    Append one JSON object per finished hook, flushed as soon as it is written.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write(self, chapter_number: int, hook: str) -> None:
+        line = json.dumps(
+            {"chapter_number": chapter_number, "hook": hook},
+            ensure_ascii=False,
+        )
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class CsvSink(Sink):
+    """
+    One CSV row per hook. Written with a BOM so Excel opens Indic text correctly.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+
+    def write(self, chapter_number: int, hook: str) -> None:
+        with self._lock:
+            self._writer.writerow((chapter_number, hook))
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ParquetSink(Sink):
+    """
+    Parquet file written one row group at a time, so at most
+    `row_group_size` rows are held in memory. Needs pyarrow.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 1000):
+        # Imported here so runs without parquet output never load pyarrow.
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+
+        self._pa = pa
+        self.path = path
+        self.row_group_size = row_group_size
+        self._lock = threading.Lock()
+        self._schema = pa.schema([("chapter_number", pa.int64()), ("hook", pa.string())])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._rows: List[tuple] = []
+
+    def write(self, chapter_number: int, hook: str) -> None:
+        with self._lock:
+            self._rows.append((chapter_number, hook))
+            if len(self._rows) >= self.row_group_size:
+                self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self._rows:
+            return
+        numbers, hooks = zip(*self._rows)
+        self._writer.write_table(
+            self._pa.table({"chapter_number": list(numbers), "hook": list(hooks)}, schema=self._schema)
+        )
+        self._rows = []
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._writer.close()
+
+
+class XlsxSink(Sink):
+    """
+    Excel sheet built with openpyxl's write-only workbook, which streams rows
+    to a temporary file instead of keeping every cell in memory. The file
+    appears at `path` on close.
+    """
+
+    def __init__(self, path: str):
+        from openpyxl import Workbook
+
+        self.path = path
+        self._lock = threading.Lock()
+        self._workbook = Workbook(write_only=True)
+        self._sheet = self._workbook.create_sheet()
+        self._sheet.append(COLUMNS)
+
+    def write(self, chapter_number: int, hook: str) -> None:
+        with self._lock:
+            self._sheet.append((chapter_number, hook))
+
+    def close(self) -> None:
+        with self._lock:
+            self._workbook.save(self.path)
+
+
+SINK_FORMATS = {
+    "jsonl": JsonlSink,
+    "csv": CsvSink,
+    "parquet": ParquetSink,
+    "xlsx": XlsxSink,
+}
+
+
+def open_sink(path: str):
+    """
+    Open the writer that matches the file extension of `path`.
+    """
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension not in SINK_FORMATS:
+        raise ValueError(f"Unknown output format {extension!r}, expected one of {tuple(SINK_FORMATS)}")
+    return SINK_FORMATS[extension](path)
+
+
+class FanoutSink(Sink):
+    """
+    Pass every write, skip and close on to several sinks.
+    """
+
+    def __init__(self, sinks: Iterable):
+        self.sinks = list(sinks)
+
+    def write(self, chapter_number: int, hook: str) -> None:
+        for sink in self.sinks:
+            sink.write(chapter_number, hook)
+
+    def skip(self, chapter_number: int) -> None:
+        for sink in self.sinks:
+            sink.skip(chapter_number)
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+class OrderedSink(Sink):
+    """
+    Reorder buffer in front of a sink so rows land in chapter order even
+    though hooks finish out of order, starting from `first_chapter`.
+
+    Hooks are held until every earlier chapter has been written or marked
+    with skip() (a failed chapter). At most `max_buffer` hooks are held; past
+    that the oldest gap is given up on, so a chapter that never reports back
+    cannot make memory grow with the series. Anything still buffered is
+    written in order on close.
+    """
+
+    def __init__(self, sink, first_chapter: int, max_buffer: int = 1000):
+        self.sink = sink
+        self.max_buffer = max_buffer
+        self._next = first_chapter
+        self._pending: Dict[int, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    def write(self, chapter_number: int, hook: str) -> None:
+        self._add(chapter_number, hook)
+
+    def skip(self, chapter_number: int) -> None:
+        self._add(chapter_number, None)
+
+    def _add(self, chapter_number: int, hook: Optional[str]) -> None:
+        with self._lock:
+            if chapter_number < self._next:
+                # Late arrival after its gap was given up on.
+                if hook is not None:
+                    self.sink.write(chapter_number, hook)
+                return
+
+            self._pending[chapter_number] = hook
+
+            if len(self._pending) > self.max_buffer and self._next not in self._pending:
+                self._next = min(self._pending)
+
+            self._release_locked()
+
+    def _release_locked(self) -> None:
+        while self._next in self._pending:
+            hook = self._pending.pop(self._next)
+            if hook is not None:
+                self.sink.write(self._next, hook)
+            self._next += 1
+
+    def close(self) -> None:
+        with self._lock:
+            for chapter_number in sorted(self._pending):
+                hook = self._pending[chapter_number]
+                if hook is not None:
+                    self.sink.write(chapter_number, hook)
+            self._pending.clear()
+            self.sink.close()
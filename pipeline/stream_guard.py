@@ -0,0 +1,66 @@
+import re
+from typing import Optional
+
+from pipeline.validator import MAX_SENTENCES, MAX_WORDS, count_words, iter_words
+
+# Where a model starts talking about the hook instead of writing it.
+_TRAILER = re.compile(
+    r"\n\s*\n"
+    r"|\n\s*(?:\*\*|#|-{3,}|\()"
+    r"|\b(?:Explanation|Note|Rationale|Why this works|Format)\s*:"
+    r"|\((?:Note|Format|Word count)",
+    re.IGNORECASE,
+)
+_SENTENCE_END = re.compile(r"[.!?\u0964\u0965]+[\"'\u201d\u2019]?(?=\s|$)")
+_LEADING_LABEL = re.compile(r"^\s*(?:\*\*)?\s*(?:hook|हुक)\s*(?:\*\*)?\s*[:：]\s*", re.IGNORECASE)
+
+
+class HookStreamGuard:
+    """
+    Enforce the hook contract while tokens stream in.
+
+    check() is called with the text received so far and returns the length
+    to keep once the stream should stop:
+      - when the model starts an explanation, note, label block or blank line
+      - after MAX_SENTENCES complete sentences, when more text follows
+      - once MAX_WORDS is passed; the last complete sentence is kept if there
+        is one, otherwise the over-long text is kept so validation rejects it
+    """
+
+    def check(self, text: str) -> Optional[int]:
+        body_start = self._body_start(text)
+
+        # A blank line or label before the hook itself is not a trailer,
+        # so keep looking past matches with no words in front of them.
+        for trailer in _TRAILER.finditer(text, body_start):
+            if count_words(text[body_start:trailer.start()]) > 0:
+                return trailer.start()
+
+        ends = [m.end() for m in _SENTENCE_END.finditer(text, body_start)]
+        if len(ends) >= MAX_SENTENCES and count_words(text[ends[MAX_SENTENCES - 1]:]) > 0:
+            return ends[MAX_SENTENCES - 1]
+
+        if count_words(text[body_start:]) > MAX_WORDS:
+            within = [end for end in ends if count_words(text[body_start:end]) <= MAX_WORDS]
+            if within:
+                return within[-1]
+            words = list(iter_words(text, body_start))
+            return words[MAX_WORDS].end()
+
+        return None
+
+    @staticmethod
+    def _body_start(text: str) -> int:
+        label = _LEADING_LABEL.match(text)
+        return label.end() if label else 0
+
+    def finalize(self, text: str) -> str:
+        return text[self._body_start(text):].strip()
+
+    def apply(self, text: str) -> str:
+        """
+        Cut a complete response where check() would have stopped its
+        stream, then finalize it.
+        """
+        stop_at = self.check(text)
+        return self.finalize(text if stop_at is None else text[:stop_at])
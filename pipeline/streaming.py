@@ -0,0 +1,74 @@
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# Chapter 1 has no previous chapter, so the first hook leads into chapter 2.
+FIRST_HOOK_CHAPTER = 2
+
+
+def iter_chapter_pairs(chapters: Iterable[str]) -> Iterator[Tuple[int, str, str]]:
+    """
+    Yield (idx, previous_chapter_text, current_chapter_text) as chapters arrive.
+
+    idx matches the position of the current chapter, so the first pair has
+    idx 1 just like the chapter_pairs list main.py used to build.
+    """
+    previous = None
+
+    for idx, current in enumerate(chapters):
+        if previous is not None:
+            yield idx, previous, current
+        previous = current
+
+
+def run_series_pipeline(
+    series_slug: str,
+    chapters: Iterable[str],
+    worker: Callable,
+    on_result: Callable[[int, str], None],
+    executor: Executor,
+    max_pending: int = 10,
+    on_failure: Optional[Callable[[int], None]] = None,
+) -> int:
+    """
+    Feed chapter pairs to `worker` on `executor` while ingestion is running.
+
+    At most `max_pending` pairs are in flight; once that bound is reached
+    ingestion blocks until a hook finishes, so neither chapter text nor
+    futures pile up on long series. Each worker returns
+    (chapter_number, hook), which is passed to `on_result` as soon as it
+    is done; the chapter number of a failed pair goes to `on_failure`.
+    Returns the number of pairs submitted.
+    """
+    in_flight: Dict[Future, int] = {}
+    submitted = 0
+
+    def drain(done: Iterable[Future]) -> None:
+        for future in done:
+            chapter_number = in_flight.pop(future)
+            try:
+                chapter_number, hook = future.result()
+            except Exception as e:
+                print(f"Hook generation failed: {e}")
+                if on_failure is not None:
+                    on_failure(chapter_number)
+                continue
+            on_result(chapter_number, hook)
+
+    for idx, prev_text, curr_text in iter_chapter_pairs(chapters):
+        finished = {f for f in in_flight if f.done()}
+
+        if len(in_flight) - len(finished) >= max_pending:
+            done, _ = wait(set(in_flight) - finished, return_when=FIRST_COMPLETED)
+            finished |= done
+
+        drain(finished)
+
+        future = executor.submit(worker, series_slug, idx, prev_text, curr_text)
+        in_flight[future] = idx + 1
+        submitted += 1
+
+    while in_flight:
+        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        drain(done)
+
+    return submitted
@@ -1,8 +1,190 @@
-def validate_hook(hook: str) -> bool:
-    if len(hook.split()) < 5:
-        return True
-    if "this chapter" in hook.lower():
-        return True
-    if len(hook.split()) > 35:
-        return True
-    return False
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, Iterator, List, NamedTuple, Tuple
+
+from metrics import timed
+
+MIN_WORDS = 5
+MAX_WORDS = 35
+MAX_SENTENCES = 2
+NGRAM_SIZE = 5
+
+# Word range the prompt steers towards; used to rank otherwise valid hooks.
+IDEAL_WORDS = (15, 30)
+STRONG_SCORE = 95.0
+
+# \w misses the dependent vowel signs and viramas of Indic scripts, which
+# would split every Devanagari word into fragments. U+0900-U+0DFF covers
+# Devanagari through Sinhala (minus the danda punctuation); ZWJ/ZWNJ appear
+# inside conjuncts.
+_WORD = re.compile(r"[\w\u0900-\u0963\u0966-\u0DFF\u200c\u200d]+")
+_DASH = re.compile(r"[\-\u2010-\u2015\u2212\u2E3A\u2E3B]")
+_SENTENCE_END = re.compile(r"[.!?\u0964\u0965]+")
+_QUOTED = re.compile(r"[\"\u201c\u201d\u201e\u00ab\u00bb]([^\"\u201c\u201d\u201e\u00ab\u00bb]+)[\"\u201c\u201d\u201e\u00ab\u00bb]")
+
+_META_REFERENCES = (
+    "this chapter",
+    "next chapter",
+    "previous chapter",
+    "इस अध्याय",
+    "अगले अध्याय",
+    "पिछले अध्याय",
+    "इस भाग",
+    "अगले भाग",
+)
+
+_LABEL = re.compile(r"^\s*(?:\*\*)?\s*(?:hook|हुक|answer|output)\s*(?:\*\*)?\s*[:：]", re.IGNORECASE)
+_EXPLANATION = re.compile(r"\b(?:explanation|note|rationale)\s*:", re.IGNORECASE)
+_MARKDOWN = re.compile(r"(?:\*\*|__|^#+\s|^\s*[-*]\s)", re.MULTILINE)
+
+
+class ValidationResult(NamedTuple):
+    ok: bool
+    reasons: List[str]
+
+
+def words(text: str) -> List[str]:
+    return _WORD.findall(text or "")
+
+
+def iter_words(text: str, pos: int = 0) -> Iterator["re.Match"]:
+    """Word matches from `pos` on, for callers that need their positions."""
+    return _WORD.finditer(text or "", pos)
+
+
+def count_words(text: str) -> int:
+    return len(words(text))
+
+
+def count_sentences(text: str) -> int:
+    return len([s for s in _SENTENCE_END.split(text or "") if words(s)])
+
+
+def _ngrams(tokens: List[str], n: int) -> Iterable[Tuple[str, ...]]:
+    return (tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+class ChapterIndex:
+    """
+    Word n-gram set of a chapter, used to spot text copied verbatim into a hook.
+    """
+
+    def __init__(self, text: str, n: int = NGRAM_SIZE):
+        self.n = n
+        tokens = [w.lower() for w in words(text)]
+        self.normalized = " ".join(tokens)
+        self.ngrams: FrozenSet[int] = frozenset(hash(g) for g in _ngrams(tokens, n))
+
+    def copied_from(self, hook: str) -> bool:
+        tokens = [w.lower() for w in words(hook)]
+        if any(hash(g) in self.ngrams for g in _ngrams(tokens, self.n)):
+            return True
+
+        # Short quoted dialogue slips under the n-gram size, so match quotes
+        # of three or more words directly.
+        for quote in _QUOTED.findall(hook):
+            quoted = [w.lower() for w in words(quote)]
+            if len(quoted) >= 3 and " ".join(quoted) in self.normalized:
+                return True
+
+        return False
+
+
+_indexes: "OrderedDict[str, ChapterIndex]" = OrderedDict()
+_indexes_lock = threading.Lock()
+_INDEX_CACHE_SIZE = 64
+
+
+def chapter_index(text: str) -> ChapterIndex:
+    """
+    Build the n-gram index of a chapter once and reuse it for every
+    candidate and regeneration checked against that chapter.
+    """
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    with _indexes_lock:
+        if key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+
+    index = ChapterIndex(text)
+
+    with _indexes_lock:
+        _indexes[key] = index
+        while len(_indexes) > _INDEX_CACHE_SIZE:
+            _indexes.popitem(last=False)
+
+    return index
+
+
+@timed("validation")
+def check_hook(hook: str, source_texts: Iterable[str] = ()) -> ValidationResult:
+    """
+    Check a hook against the prompt's hard rules and list every rule it breaks.
+
+    `source_texts` are the chapters the hook was written from; any run of
+    NGRAM_SIZE words copied from them counts as verbatim dialogue.
+    """
+    reasons: List[str] = []
+    hook = (hook or "").strip()
+
+    word_count = count_words(hook)
+    if word_count < MIN_WORDS:
+        reasons.append(f"too short ({word_count} words)")
+    elif word_count > MAX_WORDS:
+        reasons.append(f"too long ({word_count} words)")
+
+    sentence_count = count_sentences(hook)
+    if sentence_count > MAX_SENTENCES:
+        reasons.append(f"too many sentences ({sentence_count})")
+
+    if _DASH.search(hook):
+        reasons.append("contains hyphen or dash")
+
+    lowered = hook.lower()
+    if any(ref in lowered for ref in _META_REFERENCES):
+        reasons.append("refers to the chapter itself")
+
+    if _LABEL.search(hook) or _EXPLANATION.search(hook) or _MARKDOWN.search(hook):
+        reasons.append("contains labels, explanations or markdown")
+
+    for text in source_texts:
+        if not text:
+            continue
+        if chapter_index(text).copied_from(hook):
+            reasons.append("copies text from the chapter")
+            break
+
+    return ValidationResult(not reasons, reasons)
+
+
+def validate_hook(hook: str, source_texts: Iterable[str] = ()) -> bool:
+    """True when the hook passes every rule."""
+    return check_hook(hook, source_texts).ok
+
+
+def score_hook(hook: str, source_texts: Iterable[str] = ()) -> float:
+    """
+    Rank candidate hooks: 100 for a hook that passes every rule, sits in
+    IDEAL_WORDS and ends on sentence punctuation; broken rules cost far
+    more than length or format drift.
+    """
+    result = check_hook(hook, source_texts)
+    score = 100.0 - 30.0 * len(result.reasons)
+
+    word_count = count_words(hook)
+    low, high = IDEAL_WORDS
+    if word_count < low:
+        score -= low - word_count
+    elif word_count > high:
+        score -= 2 * (word_count - high)
+
+    if not re.search(r"[.!?\u0964]\s*$", (hook or "").strip()):
+        score -= 5
+
+    if "\n" in (hook or "").strip():
+        score -= 10
+
+    return score
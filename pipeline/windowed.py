@@ -0,0 +1,259 @@
+import json
+import os
+import re
+from concurrent.futures import Executor, Future, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from llm.gateway import DEFAULT_MODEL, chat_complete, resolve_model
+from llm.router import routed
+from pipeline.budget import chapter_digest, head_and_tail
+from pipeline.hook_index import HookIndex, text_hash
+from pipeline.journal import HookJournal
+from pipeline.prompt import PROMPT_VERSION, WINDOW_PROMPT_VERSION, build_window_messages
+from pipeline.runner import process_chapter
+from pipeline.validator import validate_hook
+
+_FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def iter_chapter_windows(
+    chapters: Iterable[str],
+    window_size: int,
+) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Yield (first_chapter_number, chapters) windows of `window_size` chapters.
+
+    Consecutive windows share one chapter, so every boundary of the series
+    falls inside exactly one window.
+    """
+    window: List[str] = []
+    first_number = 1
+
+    for chapter_text in chapters:
+        window.append(chapter_text)
+        if len(window) == window_size:
+            yield first_number, window
+            first_number += window_size - 1
+            window = [window[-1]]
+
+    if len(window) > 1:
+        yield first_number, window
+
+
+def parse_window_hooks(text: str) -> Dict[int, str]:
+    """
+    Extract {chapter_number: hook} from the model's JSON answer, tolerating
+    code fences and stray text around the object.
+    """
+    text = _FENCE.sub("", (text or "").strip())
+
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+
+    try:
+        payload = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return {}
+
+    hooks: Dict[int, str] = {}
+    for item in payload.get("hooks") or []:
+        try:
+            number = int(item["chapter"])
+            hook = str(item["hook"]).strip()
+        except (KeyError, TypeError, ValueError):
+            continue
+        if hook:
+            hooks[number] = hook
+
+    return hooks
+
+
+def generate_window_hooks(
+    first_chapter_number: int,
+    chapters: List[str],
+    model: str = DEFAULT_MODEL,
+) -> Dict[int, str]:
+    """
+    Ask for every boundary hook of a window in one request and return the
+    hooks that parse and validate, keyed by the chapter they lead into.
+    """
+    input_budget = int(os.getenv("HOOK_INPUT_TOKEN_BUDGET", 16000))
+    digest_tokens = int(os.getenv("HOOK_DIGEST_TOKENS", 800))
+    per_chapter = max(digest_tokens, (input_budget - digest_tokens) // max(1, len(chapters) - 1))
+
+    numbered = [(first_chapter_number, chapter_digest(chapters[0], digest_tokens))]
+    numbered.extend(
+        (first_chapter_number + offset, head_and_tail(text, per_chapter, head_share=0.6))
+        for offset, text in enumerate(chapters[1:], start=1)
+    )
+
+    messages = build_window_messages(numbered)
+
+    def request(model_name, cancel):
+        return chat_complete(
+            messages,
+            model=model_name,
+            max_tokens=resolve_model(model_name)["max_tokens"] * (len(chapters) - 1),
+            prompt_cache_key=WINDOW_PROMPT_VERSION,
+        )
+
+    answer = routed(model, request)
+
+    hooks: Dict[int, str] = {}
+    for number, hook in parse_window_hooks(answer).items():
+        offset = number - first_chapter_number
+        if not 1 <= offset < len(chapters):
+            continue
+        if validate_hook(hook, (chapters[offset - 1], chapters[offset])):
+            hooks[number] = hook
+
+    return hooks
+
+
+def window_worker(
+    series_slug: str,
+    first_chapter_number: int,
+    chapters: List[str],
+    model: str = DEFAULT_MODEL,
+    journal: Optional[HookJournal] = None,
+    index: Optional[HookIndex] = None,
+    incremental: bool = False,
+) -> List[Tuple[int, str]]:
+    """
+    Hooks for every boundary of a window. Boundaries missing from the
+    windowed answer or failing validation are retried one by one.
+    Boundaries already in `journal`, or with `incremental` unchanged in
+    `index` under either prompt, are reused; new hooks are journaled and
+    indexed under the prompt version that produced them as soon as they
+    exist.
+    """
+    numbers = range(first_chapter_number + 1, first_chapter_number + len(chapters))
+    hashes = [text_hash(text) for text in chapters] if index is not None else []
+    hooks: Dict[int, str] = {}
+
+    for number in numbers:
+        hook = journal.done_hook(number, model) if journal is not None else None
+        if hook is None and incremental and index is not None:
+            offset = number - first_chapter_number
+            for prompt_version in (WINDOW_PROMPT_VERSION, PROMPT_VERSION):
+                hook = index.get(series_slug, hashes[offset - 1], hashes[offset], model, prompt_version)
+                if hook is not None:
+                    break
+        if hook is not None:
+            hooks[number] = hook
+
+    def record(
+        chapter_number: int,
+        hook: Optional[str] = None,
+        error: Optional[str] = None,
+        prompt_version: str = WINDOW_PROMPT_VERSION,
+    ) -> None:
+        if index is not None and hook is not None:
+            offset = chapter_number - first_chapter_number
+            index.put(
+                series_slug,
+                hashes[offset - 1],
+                hashes[offset],
+                model,
+                prompt_version,
+                chapter_number,
+                hook,
+            )
+        if journal is not None:
+            journal.record(
+                chapter_number,
+                f"{series_slug}_chapter_{chapter_number}",
+                model,
+                hook=hook,
+                error=error,
+            )
+
+    # A single missing boundary is cheaper as a plain pair request below.
+    if len(numbers) - len(hooks) > 1:
+        try:
+            generated = generate_window_hooks(first_chapter_number, chapters, model)
+        except Exception as e:
+            print(f"Window starting at chapter {first_chapter_number} failed: {e}")
+            generated = {}
+
+        for chapter_number, hook in generated.items():
+            if chapter_number not in hooks:
+                hooks[chapter_number] = hook
+                record(chapter_number, hook)
+
+    for chapter_number in numbers:
+        if chapter_number in hooks:
+            continue
+
+        offset = chapter_number - first_chapter_number
+        try:
+            hooks[chapter_number] = process_chapter(
+                chapter_id=f"{series_slug}_chapter_{chapter_number}",
+                previous_chapter_text=chapters[offset - 1],
+                current_chapter_text=chapters[offset],
+                model=model,
+            )
+        except Exception as e:
+            print(f"Hook generation failed: {e}")
+            record(chapter_number, error=str(e))
+        else:
+            record(chapter_number, hooks[chapter_number], prompt_version=PROMPT_VERSION)
+
+    return sorted(hooks.items())
+
+
+def run_windowed_pipeline(
+    series_slug: str,
+    chapters: Iterable[str],
+    on_result: Callable[[int, str], None],
+    executor: Executor,
+    window_size: int = 4,
+    model: str = DEFAULT_MODEL,
+    max_pending: int = 4,
+    journal: Optional[HookJournal] = None,
+    on_failure: Optional[Callable[[int], None]] = None,
+    index: Optional[HookIndex] = None,
+    incremental: bool = False,
+) -> int:
+    """
+    Windowed counterpart of run_series_pipeline: windows are submitted as
+    chapters arrive, with at most `max_pending` windows in flight. Boundaries
+    that end up without a hook go to `on_failure`. Returns the number of
+    windows submitted.
+    """
+    in_flight: Dict[Future, range] = {}
+    submitted = 0
+
+    def drain(done: Iterable[Future]) -> None:
+        for future in done:
+            numbers = in_flight.pop(future)
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"Hook generation failed: {e}")
+                results = []
+            for chapter_number, hook in results:
+                on_result(chapter_number, hook)
+            if on_failure is not None:
+                written = {chapter_number for chapter_number, _ in results}
+                for chapter_number in numbers:
+                    if chapter_number not in written:
+                        on_failure(chapter_number)
+
+    for first_number, window in iter_chapter_windows(chapters, window_size):
+        if len(in_flight) >= max_pending:
+            done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+            drain(done)
+
+        future = executor.submit(
+            window_worker, series_slug, first_number, window, model, journal, index, incremental
+        )
+        in_flight[future] = range(first_number + 1, first_number + len(window))
+        submitted += 1
+
+    while in_flight:
+        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        drain(done)
+
+    return submitted
@@ -0,0 +1,15 @@
+import sys
+import types
+
+# config holds the real Pratilipi credentials and is not checked in. The
+# tests never reach the API, so placeholder values are enough to import
+# the ingestion modules.
+try:
+    import config  # noqa: F401
+except ImportError:
+    config = types.ModuleType("config")
+    config.PRATILIPI_BASE_URL = "http://localhost"
+    config.PRATILIPI_GRAPHQL_URL = "http://localhost/graphql"
+    config.PRATILIPI_TOKEN = "test"
+    config.USER_AGENT = "pre-cap-tests"
+    sys.modules["config"] = config
@@ -0,0 +1,207 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("requests")
+
+from ingestion.api_client import PratilipiClient, build_session, iter_chapters_from_html_file
+from ingestion.ingest_chapter import HtmlFileIngestor
+
+
+def paged_client(pages):
+    """Client whose series listing is served from {cursor: (ids, next_cursor)}."""
+    client = PratilipiClient()
+    requested = []
+
+    def fetch_page(series_slug, cursor, limit):
+        requested.append(cursor)
+        return pages[cursor]
+
+    client._fetch_series_page = fetch_page
+    return client, requested
+
+
+def test_series_ids_follow_the_cursor():
+    client, requested = paged_client({
+        "0": (["p1", "p2"], "c1"),
+        "c1": (["p3"], "c2"),
+        "c2": ([], None),
+    })
+    assert list(client.iter_pratilipi_ids_from_series("series")) == ["p1", "p2", "p3"]
+    assert requested == ["0", "c1", "c2"]
+
+
+def test_repeated_cursor_ends_the_listing():
+    client, requested = paged_client({
+        "0": (["p1"], "c1"),
+        "c1": (["p2"], "c1"),
+    })
+    assert client.get_pratilipi_ids_from_series("series") == ["p1", "p2"]
+    assert requested == ["0", "c1"]
+
+
+EXPORT = (
+    "<html><body><p>Chapter 1</p><p>पहला अध्याय &amp; intro.</p>"
+    "<p>Chapter 2</p><p>Second<br>chapter.</p>"
+    "<p>Chapter 3</p><p>तीसरा</p></body></html>"
+)
+CHAPTERS = ["पहला अध्याय & intro.", "Second\nchapter.", "तीसरा"]
+
+
+def test_html_export_is_split_at_chapter_headings(tmp_path):
+    path = tmp_path / "series.html"
+    path.write_text(EXPORT, encoding="utf-8")
+
+    assert list(iter_chapters_from_html_file(str(path))) == CHAPTERS
+    # Small chunks split multi-byte characters and headings across reads.
+    assert list(iter_chapters_from_html_file(str(path), chunk_size=5)) == CHAPTERS
+
+
+def test_missing_or_empty_export(tmp_path):
+    assert list(iter_chapters_from_html_file(str(tmp_path / "missing.html"))) == []
+    (tmp_path / "empty.html").write_bytes(b"")
+    assert list(iter_chapters_from_html_file(str(tmp_path / "empty.html"))) == []
+
+
+def test_html_file_ingestor(tmp_path):
+    (tmp_path / "abc.html").write_text(EXPORT, encoding="utf-8")
+    ingestor = HtmlFileIngestor(str(tmp_path / "{series_slug}.html"), chunk_size=16)
+    assert list(ingestor.iter_series_chapters("abc")) == CHAPTERS
+
+
+@pytest.fixture
+def flaky_server():
+    """Local GraphQL endpoint that answers 503 to the first two posts."""
+    posts = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            posts.append(self.headers.get("language"))
+            if len(posts) <= 2:
+                status, body = 503, b"busy"
+            else:
+                status, body = 200, json.dumps({"data": {"ok": True}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/graphql", posts
+    server.shutdown()
+    server.server_close()
+
+
+def test_session_retries_unavailable_responses(flaky_server):
+    url, posts = flaky_server
+    response = build_session(pool_size=2, backoff=0).post(url, json={}, timeout=5)
+    assert response.status_code == 200
+    assert len(posts) == 3
+
+
+def test_session_gives_up_after_max_retries(flaky_server):
+    url, posts = flaky_server
+    response = build_session(max_retries=1, backoff=0).post(url, json={}, timeout=5)
+    assert response.status_code == 503
+    assert len(posts) == 2
+
+
+def test_client_posts_through_the_retrying_session(flaky_server, monkeypatch):
+    url, posts = flaky_server
+    monkeypatch.setattr("ingestion.api_client.PRATILIPI_GRAPHQL_URL", url)
+    client = PratilipiClient(backoff=0)
+
+    assert client._post("query {}", {}, language="hi") == {"data": {"ok": True}}
+    assert posts == ["hi", "hi", "hi"]
+    assert client._graphql_headers("hi") is client._graphql_headers("hi")
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.content = json.dumps(data).encode()
+
+    def json(self):
+        return json.loads(self.content)
+
+
+def batching_client(parts, fail_above=None, batch_answer=None):
+    """
+    Client whose GraphQL requests are answered from {pratilipi_id: content}.
+    Batches larger than `fail_above` raise, and `batch_answer(i, pid)` can
+    override the aliased answer of one id.
+    """
+    client = PratilipiClient(batch_size=4, max_batch_size=4)
+    requested = []
+
+    def request(query, variables, language="en"):
+        if "where" in variables:
+            pid = variables["where"]["pratilipiId"]
+            requested.append([pid])
+            if isinstance(parts[pid], Exception):
+                raise parts[pid]
+            return FakeResponse({"data": {"getPratilipiChapters": {"chapters": [{"content": parts[pid]}]}}})
+
+        ids = [variables[f"w{i}"]["pratilipiId"] for i in range(len(variables))]
+        requested.append(ids)
+        if fail_above is not None and len(ids) > fail_above:
+            raise RuntimeError("payload too large")
+
+        data, errors = {}, []
+        for i, pid in enumerate(ids):
+            answer = {"chapters": [{"content": parts[pid]}]}
+            if batch_answer is not None:
+                answer = batch_answer(i, pid, answer, errors)
+            data[f"p{i}"] = answer
+        return FakeResponse({"data": data, "errors": errors})
+
+    client._request = request
+    return client, requested
+
+
+def test_chapters_are_fetched_in_batches():
+    parts = {f"p{i}": f"<p>part {i}</p>" for i in range(6)}
+    client, requested = batching_client(parts)
+
+    assert client.fetch_chapter_contents(list(parts)) == {pid: [f"part {pid[1:]}"] for pid in parts}
+    assert requested == [["p0", "p1", "p2", "p3"], ["p4", "p5"]]
+
+
+def test_missing_and_errored_answers_are_refetched_alone():
+    parts = {"a": "<p>A</p>", "b": "<p>B</p>", "c": "<p>C</p>"}
+
+    def batch_answer(i, pid, answer, errors):
+        if pid == "a":
+            return None
+        if pid == "c":
+            errors.append({"message": "timeout", "path": [f"p{i}", "chapters"]})
+        return answer
+
+    client, requested = batching_client(parts, batch_answer=batch_answer)
+
+    assert client.fetch_chapter_contents(list(parts)) == {"a": ["A"], "b": ["B"], "c": ["C"]}
+    assert requested == [["a", "b", "c"], ["a"], ["c"]]
+
+
+def test_failed_batches_are_retried_smaller():
+    parts = {f"p{i}": f"<p>part {i}</p>" for i in range(4)}
+    client, requested = batching_client(parts, fail_above=2)
+
+    assert sorted(client.fetch_chapter_contents(list(parts))) == list(parts)
+    assert requested[:3] == [["p0", "p1", "p2", "p3"], ["p0", "p1"], ["p2", "p3"]]
+
+
+def test_ids_that_fail_alone_are_left_out():
+    parts = {"a": "<p>A</p>", "b": RuntimeError("gone")}
+    client, _ = batching_client(parts, batch_answer=lambda i, pid, answer, errors: None if pid == "b" else answer)
+
+    assert client.fetch_chapter_contents(["a", "b"]) == {"a": ["A"]}
@@ -0,0 +1,94 @@
+import random
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+from ingestion.async_ingest import AsyncChapterIngestor
+
+
+class FakeClient:
+    batch_size = 3
+
+    def __init__(self, ids):
+        self.ids = ids
+
+    def get_pratilipi_ids_from_series(self, series_slug):
+        return list(self.ids)
+
+    def iter_pratilipi_ids_from_series(self, series_slug):
+        yield from self.ids
+
+
+class FakeIngestor:
+    """Parts finish in random order; tracks how many fetches overlap."""
+
+    def __init__(self, parts):
+        self.client = FakeClient(list(parts))
+        self.parts = parts
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def get_chapters(self, pratilipi_id, language="en"):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        try:
+            time.sleep(random.uniform(0, 0.01))
+            chapters = self.parts[pratilipi_id]
+            if isinstance(chapters, Exception):
+                raise chapters
+            return chapters
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def get_chapters_many(self, pratilipi_ids, language="en"):
+        return {pid: self.get_chapters(pid, language) for pid in pratilipi_ids}
+
+
+def test_chapters_come_in_part_order():
+    parts = {f"p{i}": [f"chapter {i}.{j}" for j in range(i % 3)] for i in range(40)}
+    fake = FakeIngestor(parts)
+    ingestor = AsyncChapterIngestor(fake, max_concurrency=4)
+    try:
+        chapters = list(ingestor.iter_series_chapters("series", "hi"))
+    finally:
+        ingestor.close()
+
+    assert chapters == [chapter for part in parts.values() for chapter in part]
+    assert fake.peak <= 4
+
+
+def test_empty_series():
+    ingestor = AsyncChapterIngestor(FakeIngestor({}), max_concurrency=2)
+    try:
+        assert list(ingestor.iter_series_chapters("series")) == []
+    finally:
+        ingestor.close()
+
+
+def test_failed_part_ends_the_series():
+    parts = {f"p{i}": [f"chapter {i}"] for i in range(9)}
+    parts["p4"] = RuntimeError("boom")
+    ingestor = AsyncChapterIngestor(FakeIngestor(parts), max_concurrency=2)
+
+    chapters = []
+    try:
+        with pytest.raises(RuntimeError):
+            for chapter in ingestor.iter_series_chapters("series"):
+                chapters.append(chapter)
+    finally:
+        ingestor.close()
+
+    # No chapter after the failed batch is yielded under a shifted number.
+    assert chapters == ["chapter 0", "chapter 1", "chapter 2"]
+
+
+def test_ingestor_passed_in_is_left_open():
+    fake = FakeIngestor({})
+    fake.close = lambda: pytest.fail("closed an ingestor it does not own")
+    AsyncChapterIngestor(fake, max_concurrency=2).close()
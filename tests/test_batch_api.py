@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from llm.gateway import resolve_model
+from pipeline import batch_api
+from pipeline.batch_api import LocalBatchBackend, parse_batch_result, run_series_batch
+
+CHAPTERS = [
+    "Asha reaches the village at dusk.",
+    "The headman refuses to open the temple.",
+    "Asha finds a key under the banyan tree.",
+    "BROKEN: a storm cuts the village off.",
+]
+HOOK = "Asha opens the sealed letter, and the name inside makes her freeze."
+
+
+def responder(body):
+    if "BROKEN" in json.dumps(body):
+        raise RuntimeError("model error")
+    return HOOK
+
+
+def test_offline_batch_end_to_end(tmp_path, monkeypatch):
+    retried = []
+
+    def process_chapter(chapter_id, previous_chapter_text, current_chapter_text, model):
+        retried.append(chapter_id)
+        return "Retried hook for the chapter that failed in the batch."
+
+    monkeypatch.setattr(batch_api, "process_chapter", process_chapter)
+
+    backend = LocalBatchBackend(responder, directory=str(tmp_path / "local"))
+    results = run_series_batch(
+        "series",
+        iter(CHAPTERS),
+        backend,
+        model="gpt",
+        work_dir=str(tmp_path / "work"),
+        poll_interval=0,
+    )
+
+    assert results == [
+        (2, HOOK),
+        (3, HOOK),
+        (4, "Retried hook for the chapter that failed in the batch."),
+    ]
+    assert retried == ["series_chapter_4"]
+
+    with open(tmp_path / "work" / "series_batch_input.jsonl", encoding="utf-8") as f:
+        requests = [json.loads(line) for line in f]
+    assert [r["custom_id"] for r in requests] == ["series:2", "series:3", "series:4"]
+    assert requests[0]["body"]["messages"]
+
+
+def test_default_backend_answers_through_the_gateway(tmp_path, monkeypatch):
+    calls = []
+
+    def chat_complete(messages, model, temperature, max_tokens):
+        calls.append((model, temperature, max_tokens))
+        return HOOK
+
+    monkeypatch.setattr(batch_api, "chat_complete", chat_complete)
+    monkeypatch.setattr(batch_api, "process_chapter", None)
+
+    backend = LocalBatchBackend(directory=str(tmp_path / "local"))
+    results = run_series_batch(
+        "series",
+        iter(CHAPTERS[:3]),
+        backend,
+        model="gpt",
+        work_dir=str(tmp_path / "work"),
+        poll_interval=0,
+    )
+
+    config = resolve_model("gpt")
+    assert results == [(2, HOOK), (3, HOOK)]
+    assert calls == [(config["model"], config["temperature"], config["max_tokens"])] * 2
+
+
+def test_parse_batch_result():
+    ok = {
+        "custom_id": "series:7",
+        "response": {"status_code": 200, "body": {"choices": [{"message": {"content": " hook "}}]}},
+        "error": None,
+    }
+    failed = {"custom_id": "series:8", "response": None, "error": {"message": "boom"}}
+
+    assert parse_batch_result(ok) == (7, "hook")
+    assert parse_batch_result(failed) == (8, None)
+
+
+def test_too_few_chapters_submit_nothing(tmp_path):
+    backend = LocalBatchBackend(responder, directory=str(tmp_path / "local"))
+    assert run_series_batch("series", iter(CHAPTERS[:1]), backend, work_dir=str(tmp_path)) == []
@@ -0,0 +1,93 @@
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from pipeline import best_of_n
+from pipeline.best_of_n import generate_best_hook
+
+STRONG = "Meera finally opens the sealed letter, and the name inside makes her blood run cold."
+WEAK = "Hook: Meera opens it."
+
+
+def test_n_choices_are_ranked_locally(monkeypatch):
+    requests = []
+
+    def chat_complete_n(messages, n, model, prompt_cache_key=None):
+        requests.append(n)
+        return [WEAK, "", STRONG]
+
+    monkeypatch.setattr(best_of_n, "chat_complete_n", chat_complete_n)
+
+    assert generate_best_hook("previous", "current", n=3, model="gpt") == STRONG
+    assert requests == [3]
+
+
+def test_n_choices_are_guarded(monkeypatch):
+    explained = STRONG + "\n\nExplanation: the name is a twist."
+    monkeypatch.setattr(best_of_n, "chat_complete_n", lambda messages, n, model, prompt_cache_key=None: [explained])
+
+    assert generate_best_hook("previous", "current", n=1, model="gpt") == STRONG
+
+
+def test_parallel_candidates_are_ranked_locally(monkeypatch):
+    def generate_hook(previous_chapter_text, current_chapter_text, model, variant, **kwargs):
+        return STRONG if variant == 1 else WEAK
+
+    monkeypatch.setattr(best_of_n, "generate_hook", generate_hook)
+
+    assert generate_best_hook("previous", "current", n=3, model="grok") == STRONG
+
+
+def test_failed_candidates_are_skipped(monkeypatch):
+    def generate_hook(previous_chapter_text, current_chapter_text, model, variant, **kwargs):
+        if variant == 0:
+            raise RuntimeError("timeout")
+        return WEAK
+
+    monkeypatch.setattr(best_of_n, "generate_hook", generate_hook)
+
+    assert generate_best_hook("previous", "current", n=2, model="grok") == WEAK
+
+
+def test_no_candidates_raise(monkeypatch):
+    def generate_hook(previous_chapter_text, current_chapter_text, model, variant, **kwargs):
+        raise RuntimeError("timeout")
+
+    monkeypatch.setattr(best_of_n, "generate_hook", generate_hook)
+
+    with pytest.raises(RuntimeError):
+        generate_best_hook("previous", "current", n=2, model="grok")
+
+
+def test_empty_n_choices_raise(monkeypatch):
+    monkeypatch.setattr(best_of_n, "chat_complete_n", lambda messages, n, model, prompt_cache_key=None: ["", ""])
+
+    with pytest.raises(RuntimeError):
+        generate_best_hook("previous", "current", n=2, model="gpt")
+
+
+def test_strong_candidate_cancels_the_others(monkeypatch):
+    started, saw_cancel = [], []
+
+    def generate_hook(previous_chapter_text, current_chapter_text, model, variant, cancel=None):
+        if variant == 0:
+            return STRONG
+        started.append(variant)
+        saw_cancel.append(cancel.wait(5))
+        return WEAK
+
+    monkeypatch.setattr(best_of_n, "generate_hook", generate_hook)
+
+    started_at = time.monotonic()
+    assert generate_best_hook("previous", "current", n=3, model="grok") == STRONG
+    assert time.monotonic() - started_at < 1
+
+    # Candidates still queued never start; the ones running see the cancel.
+    deadline = time.monotonic() + 5
+    while len(saw_cancel) < len(started) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saw_cancel == [True] * len(started)
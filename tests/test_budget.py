@@ -0,0 +1,44 @@
+from pipeline.budget import (
+    ELISION,
+    chapter_digest,
+    count_tokens,
+    head_and_tail,
+    prepare_chapter_inputs,
+)
+
+CHAPTER = " ".join(f"Sentence number {i} moves the story along." for i in range(400))
+
+
+def test_short_text_is_kept_whole():
+    assert head_and_tail("One sentence. Two sentences.", 100, head_share=0.5) == "One sentence. Two sentences."
+
+
+def test_long_text_keeps_whole_sentences_from_both_ends():
+    trimmed = head_and_tail(CHAPTER, 200, head_share=0.5)
+    head, tail = trimmed.split(f" {ELISION} ")
+
+    assert count_tokens(trimmed) <= 200 + count_tokens(ELISION) + 2
+    assert CHAPTER.startswith(head)
+    assert CHAPTER.endswith(tail)
+    assert head.endswith(".") and tail.endswith(".")
+
+
+def test_single_huge_sentence_falls_back_to_a_character_cut():
+    text = "word " * 5000
+    assert len(head_and_tail(text, 100, head_share=0.5)) == 200
+
+
+def test_digest_favours_the_end_of_the_chapter():
+    digest = chapter_digest(CHAPTER, 200)
+    head, tail = digest.split(f" {ELISION} ")
+    assert len(tail) > len(head)
+    assert chapter_digest(CHAPTER, 200) is digest
+
+
+def test_inputs_fit_the_budget(monkeypatch):
+    monkeypatch.setenv("HOOK_INPUT_TOKEN_BUDGET", "600")
+    monkeypatch.setenv("HOOK_DIGEST_TOKENS", "150")
+
+    previous, current = prepare_chapter_inputs(CHAPTER, CHAPTER)
+    assert count_tokens(previous) <= 150 + 10
+    assert count_tokens(previous) + count_tokens(current) <= 600 + 20
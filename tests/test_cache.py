@@ -0,0 +1,136 @@
+import time
+
+import pytest
+
+from llm import cache
+from llm.cache import ResponseCache, cached_completion
+from metrics import metrics
+
+MESSAGES = [{"role": "user", "content": "Write a hook."}]
+
+
+@pytest.fixture
+def response_cache(tmp_path, monkeypatch):
+    store = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    monkeypatch.setattr(cache, "_cache", store)
+    yield store
+    store.close()
+
+
+def test_variants_get_their_own_keys():
+    key = ResponseCache.make_key("gpt", 0.7, 300, MESSAGES)
+    assert ResponseCache.make_key("gpt", 0.7, 300, MESSAGES, variant=0) == key
+    assert ResponseCache.make_key("gpt", 0.7, 300, MESSAGES, variant=1) != key
+    assert ResponseCache.make_key("gpt", 0.5, 300, MESSAGES) != key
+
+
+def test_variant_calls_are_cached_separately(response_cache):
+    calls = []
+
+    @cached_completion
+    def complete(messages, model, temperature, max_tokens, variant=0):
+        calls.append(variant)
+        return f"hook {variant}"
+
+    assert complete(MESSAGES, "gpt", 0.7, 300) == "hook 0"
+    assert complete(MESSAGES, "gpt", 0.7, 300, variant=1) == "hook 1"
+    assert complete(MESSAGES, "gpt", 0.7, 300) == "hook 0"
+    assert complete(MESSAGES, "gpt", 0.7, 300, variant=1) == "hook 1"
+    assert calls == [0, 1]
+
+
+def test_empty_responses_are_not_stored(response_cache):
+    calls = []
+
+    @cached_completion
+    def complete(messages, model, temperature, max_tokens):
+        calls.append(model)
+        return ""
+
+    complete(MESSAGES, "gpt", 0.7, 300)
+    complete(MESSAGES, "gpt", 0.7, 300)
+    assert calls == ["gpt", "gpt"]
+
+
+def test_refresh_mode_overwrites_without_reading(response_cache):
+    answers = iter(["first", "second"])
+
+    @cached_completion
+    def complete(messages, model, temperature, max_tokens):
+        return next(answers)
+
+    assert complete(MESSAGES, "gpt", 0.7, 300) == "first"
+    response_cache.mode = "refresh"
+    assert complete(MESSAGES, "gpt", 0.7, 300) == "second"
+    response_cache.mode = "on"
+    assert complete(MESSAGES, "gpt", 0.7, 300) == "second"
+
+
+def test_off_mode_bypasses_the_cache(response_cache):
+    response_cache.mode = "off"
+    calls = []
+
+    @cached_completion
+    def complete(messages, model, temperature, max_tokens):
+        calls.append(model)
+        return "hook"
+
+    complete(MESSAGES, "gpt", 0.7, 300)
+    complete(MESSAGES, "gpt", 0.7, 300)
+    assert calls == ["gpt", "gpt"]
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    store = ResponseCache(str(tmp_path / "responses.sqlite3"), max_age=0.01)
+    key = store.make_key("gpt", 0.7, 300, MESSAGES)
+    store.set(key, "gpt", "hook")
+    assert store.get(key) == "hook"
+    time.sleep(0.02)
+    assert store.get(key) is None
+    store.close()
+
+
+def test_hits_are_counted(response_cache):
+    metrics.reset()
+
+    @cached_completion
+    def complete(messages, model, temperature, max_tokens):
+        return "hook"
+
+    complete(MESSAGES, "gpt", 0.7, 300)
+    complete(MESSAGES, "gpt", 0.7, 300)
+    complete(MESSAGES, "gpt", 0.7, 300)
+    assert metrics.report()["counters"]["llm_cache_hits"] == 2
+
+
+def test_n_choices_share_keys_with_variants(response_cache):
+    calls = []
+
+    @cached_completion
+    def complete_n(messages, model, temperature, max_tokens, n):
+        calls.append(n)
+        return [f"hook {i}" if i != 1 else "" for i in range(n)]
+
+    assert complete_n(MESSAGES, "gpt", 0.7, 300, 3) == ["hook 0", "", "hook 2"]
+    # The empty choice was not stored, so the cache cannot answer all three.
+    complete_n(MESSAGES, "gpt", 0.7, 300, 3)
+    assert calls == [3, 3]
+
+    key = ResponseCache.make_key("gpt", 0.7, 300, MESSAGES, variant=2)
+    assert response_cache.get(key) == "hook 2"
+
+
+def test_encode_decode_and_cache_model(response_cache):
+    calls = []
+
+    @cached_completion(encode=str, decode=int, cache_model=lambda call: call["model"] + "#guarded")
+    def complete(messages, model, temperature, max_tokens):
+        calls.append(model)
+        return 42
+
+    assert complete(MESSAGES, "gpt", 0.7, 300) == 42
+    assert complete(MESSAGES, "gpt", 0.7, 300) == 42
+    assert calls == ["gpt"]
+
+    assert response_cache.get(ResponseCache.make_key("gpt#guarded", 0.7, 300, MESSAGES)) == "42"
+    assert response_cache.get(ResponseCache.make_key("gpt", 0.7, 300, MESSAGES)) is None
@@ -0,0 +1,209 @@
+import json
+import sqlite3
+import time
+import zlib
+
+import pytest
+
+pytest.importorskip("requests")
+
+from ingestion.chapter_store import DEFAULT_TTL, ChapterStore, content_hash, open_chapter_store
+from ingestion.html_text import CLEANER_VERSION
+from ingestion.ingest_chapter import ChapterIngestor
+
+
+class FakeClient:
+    def __init__(self, parts):
+        self.parts = parts
+        self.fetches = []
+
+    def fetch_chapter_content(self, pratilipi_id, language="en"):
+        self.fetches.append(pratilipi_id)
+        chapters = self.parts[pratilipi_id]
+        if isinstance(chapters, Exception):
+            raise chapters
+        return chapters
+
+    def fetch_chapter_contents(self, pratilipi_ids, language="en"):
+        self.fetches.append(list(pratilipi_ids))
+        return {
+            pid: self.parts[pid]
+            for pid in pratilipi_ids
+            if not isinstance(self.parts[pid], Exception)
+        }
+
+    def get_pratilipi_ids_from_series(self, series_slug):
+        return list(self.parts)
+
+    def iter_pratilipi_ids_from_series(self, series_slug):
+        return iter(list(self.parts))
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ChapterStore(str(tmp_path / "chapters.sqlite3"))
+    yield store
+    store.close()
+
+
+def make_ingestor(store, parts):
+    ingestor = ChapterIngestor(store=store)
+    ingestor.client = FakeClient(parts)
+    return ingestor
+
+
+def test_store_round_trip(store):
+    store.put("p1", "hi", ["एक", "two"])
+    entry = store.get("p1", "hi")
+    assert entry.chapters == ["एक", "two"]
+    assert entry.content_hash == content_hash(["एक", "two"])
+    assert store.get("p1", "en") is None
+
+
+def test_entries_go_stale_after_ttl(tmp_path):
+    store = ChapterStore(str(tmp_path / "chapters.sqlite3"), ttl=0.01)
+    entry = store.put("p1", "hi", ["one"])
+    assert store.is_fresh(entry)
+    time.sleep(0.02)
+    assert not store.is_fresh(store.get("p1", "hi"))
+    store.touch("p1", "hi")
+    assert store.is_fresh(store.get("p1", "hi"))
+    store.close()
+
+
+def test_chapters_from_another_cleaner_are_cleaned_again(tmp_path):
+    path = str(tmp_path / "chapters.sqlite3")
+    old = ChapterStore(path, cleaner_version="regex")
+    old.put("p1", "hi", ["old text"])
+    old.close()
+
+    store = ChapterStore(path)
+    assert not store.is_fresh(store.get("p1", "hi"))
+
+    ingestor = make_ingestor(store, {"p1": ["new text"]})
+    assert ingestor.get_chapters("p1", "hi") == ["new text"]
+    entry = store.get("p1", "hi")
+    assert entry.cleaner_version == CLEANER_VERSION
+    assert store.is_fresh(entry)
+    store.close()
+
+
+def test_stores_without_a_cleaner_version_are_upgraded(tmp_path):
+    path = str(tmp_path / "chapters.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE chapters (
+            pratilipi_id TEXT NOT NULL,
+            language TEXT NOT NULL,
+            content BLOB NOT NULL,
+            content_hash TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (pratilipi_id, language)
+        )
+        """
+    )
+    content = zlib.compress(json.dumps(["regex text"]).encode("utf-8"))
+    conn.execute(
+        "INSERT INTO chapters VALUES (?, ?, ?, ?, ?)",
+        ("p1", "hi", content, content_hash(["regex text"]), time.time()),
+    )
+    conn.commit()
+    conn.close()
+
+    store = ChapterStore(path)
+    entry = store.get("p1", "hi")
+    assert entry.chapters == ["regex text"]
+    assert not store.is_fresh(entry)
+    # Unchanged text under the new cleaner only needs the version updated.
+    store.touch("p1", "hi")
+    assert store.is_fresh(store.get("p1", "hi"))
+    store.close()
+
+
+def test_fresh_chapters_are_served_from_the_store(store):
+    ingestor = make_ingestor(store, {"p1": ["one", "two"]})
+    assert ingestor.get_chapters("p1", "hi") == ["one", "two"]
+    assert ingestor.get_chapters("p1", "hi") == ["one", "two"]
+    assert ingestor.client.fetches == ["p1"]
+
+
+def test_stale_chapters_are_refetched(store):
+    ingestor = make_ingestor(store, {"p1": ["edited"]})
+    store.put("p1", "hi", ["original"])
+    store.ttl = 0
+    assert ingestor.get_chapters("p1", "hi") == ["edited"]
+    assert store.get("p1", "hi").chapters == ["edited"]
+
+
+def test_failed_refetch_falls_back_to_the_stored_copy(store):
+    ingestor = make_ingestor(store, {"p1": RuntimeError("boom")})
+    store.put("p1", "hi", ["original"])
+    store.ttl = 0
+    assert ingestor.get_chapters("p1", "hi") == ["original"]
+
+
+def test_failed_fetch_without_stored_copy_raises(store):
+    ingestor = make_ingestor(store, {"p1": RuntimeError("boom")})
+    with pytest.raises(RuntimeError):
+        ingestor.get_chapters("p1", "hi")
+
+
+def test_empty_responses_are_not_stored(store):
+    ingestor = make_ingestor(store, {"p1": []})
+    assert ingestor.get_chapters("p1", "hi") == []
+    assert store.get("p1", "hi") is None
+
+
+def test_series_chapters_come_in_part_order(store):
+    ingestor = make_ingestor(store, {"p1": ["one", "two"], "p2": ["three"]})
+    assert list(ingestor.iter_series_chapters("series", "hi")) == ["one", "two", "three"]
+
+
+def test_many_fetches_only_what_is_not_fresh(store):
+    ingestor = make_ingestor(store, {"p1": ["one"], "p2": ["two"], "p3": ["three"]})
+    store.put("p2", "hi", ["stored two"])
+
+    assert ingestor.get_chapters_many(["p1", "p2", "p3"], "hi") == {
+        "p1": ["one"],
+        "p2": ["stored two"],
+        "p3": ["three"],
+    }
+    assert ingestor.client.fetches == [["p1", "p3"]]
+    assert store.get("p3", "hi").chapters == ["three"]
+
+
+def test_many_falls_back_to_stored_copies(store):
+    ingestor = make_ingestor(store, {"p1": RuntimeError("boom"), "p2": ["two"]})
+    store.put("p1", "hi", ["original"])
+    store.ttl = 0
+    assert ingestor.get_chapters_many(["p1", "p2"], "hi") == {"p1": ["original"], "p2": ["two"]}
+
+
+def test_many_raises_for_parts_without_stored_copy(store):
+    ingestor = make_ingestor(store, {"p1": ["one"], "p2": RuntimeError("boom"), "p3": ["three"]})
+    with pytest.raises(RuntimeError, match="p2"):
+        ingestor.get_chapters_many(["p1", "p2", "p3"], "hi")
+    # The parts that were fetched are kept for the next run.
+    assert store.get("p3", "hi").chapters == ["three"]
+
+
+def test_store_settings_come_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOOK_CHAPTER_STORE_PATH", str(tmp_path / "store" / "chapters.sqlite3"))
+    for raw, ttl in (("", DEFAULT_TTL), ("3600", 3600), ("none", None)):
+        monkeypatch.setenv("HOOK_CHAPTER_STORE_TTL", raw)
+        store = open_chapter_store()
+        assert store.ttl == ttl
+        assert store.path == str(tmp_path / "store" / "chapters.sqlite3")
+        store.close()
+
+
+def test_ingestor_closes_only_the_store_it_opened(store, tmp_path, monkeypatch):
+    ChapterIngestor(store=store).close()
+    assert store.get("p1", "hi") is None
+
+    monkeypatch.setenv("HOOK_CHAPTER_STORE_PATH", str(tmp_path / "own.sqlite3"))
+    ingestor = ChapterIngestor()
+    ingestor.close()
+    with pytest.raises(sqlite3.ProgrammingError):
+        ingestor.store.get("p1", "hi")
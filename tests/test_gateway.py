@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from llm import cache, gateway
+from llm.cache import ResponseCache
+from metrics import metrics
+from pipeline.stream_guard import HookStreamGuard
+
+MESSAGES = [{"role": "user", "content": "Write a hook."}]
+
+
+class FakeStream:
+    def __init__(self, pieces):
+        self.chunks = [
+            SimpleNamespace(usage=None, choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+            for piece in pieces
+        ]
+
+    def __iter__(self):
+        return iter(self.chunks)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_client(tmp_path, monkeypatch):
+    store = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    monkeypatch.setattr(cache, "_cache", store)
+    requests = []
+
+    def create(**kwargs):
+        requests.append(kwargs)
+        return FakeStream(["Meera opens the letter.", "\n\nExplanation: suspense"])
+
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(gateway, "get_client", lambda: client)
+    yield requests
+    store.close()
+
+
+def test_truncated_streams_are_counted_once(fake_client):
+    metrics.reset()
+
+    for _ in range(3):
+        result = gateway.stream_complete(MESSAGES, model="gpt", guard=HookStreamGuard())
+        assert result == gateway.StreamResult("Meera opens the letter.", True)
+
+    assert len(fake_client) == 1
+    assert metrics.report()["counters"]["truncated_streams"] == 1
@@ -0,0 +1,113 @@
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+import main
+from pipeline import windowed
+from pipeline.hook_index import HookIndex, text_hash
+from pipeline.prompt import PROMPT_VERSION, WINDOW_PROMPT_VERSION
+from pipeline.windowed import window_worker
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = HookIndex(str(tmp_path / "index" / "hooks.sqlite3"))
+    yield index
+    index.close()
+
+
+def test_hooks_are_keyed_by_texts_model_and_prompt(tmp_path):
+    path = str(tmp_path / "hooks.sqlite3")
+    index = HookIndex(path)
+    prev_hash, curr_hash = text_hash("one"), text_hash("two")
+    index.put("s", prev_hash, curr_hash, "gpt", "v1", 2, "first")
+    index.put("s", prev_hash, curr_hash, "gpt", "v1", 5, "replaced")
+    index.close()
+
+    index = HookIndex(path)
+    assert index.get("s", prev_hash, curr_hash, "gpt", "v1") == "replaced"
+    assert index.get("s", prev_hash, curr_hash, "gpt", "v2") is None
+    assert index.get("s", prev_hash, curr_hash, "other", "v1") is None
+    assert index.get("s", curr_hash, prev_hash, "gpt", "v1") is None
+    index.close()
+
+
+def test_unchanged_boundaries_skip_generation(index, monkeypatch):
+    calls = []
+
+    def process_chapter(chapter_id, previous_chapter_text, current_chapter_text, model, best_of):
+        calls.append(chapter_id)
+        return f"hook for {current_chapter_text}"
+
+    monkeypatch.setattr(main, "process_chapter", process_chapter)
+
+    assert main.hook_worker("s", 1, "one", "two", model="gpt", index=index) == (2, "hook for two")
+    # Renumbered, but the same texts: served from the index.
+    assert main.hook_worker("s", 4, "one", "two", model="gpt", index=index, incremental=True) == (5, "hook for two")
+    # Edited chapter: generated again.
+    assert main.hook_worker("s", 1, "one", "two, edited", model="gpt", index=index, incremental=True) == (2, "hook for two, edited")
+    # Without --incremental the index is only written.
+    main.hook_worker("s", 1, "one", "two", model="gpt", index=index)
+
+    assert calls == ["s_chapter_2", "s_chapter_2", "s_chapter_2"]
+
+
+def test_windows_reuse_unchanged_boundaries(index, monkeypatch):
+    windows, pairs = [], []
+
+    def generate_window_hooks(first, chapters, model):
+        windows.append(first)
+        return {first + i: f"window hook {chapters[i]}" for i in range(1, len(chapters))}
+
+    def process_chapter(chapter_id, previous_chapter_text, current_chapter_text, model):
+        pairs.append(chapter_id)
+        return f"pair hook {current_chapter_text}"
+
+    monkeypatch.setattr(windowed, "generate_window_hooks", generate_window_hooks)
+    monkeypatch.setattr(windowed, "process_chapter", process_chapter)
+
+    chapters = ["a", "b", "c", "d"]
+    assert window_worker("s", 1, chapters, "gpt", index=index) == [
+        (2, "window hook b"), (3, "window hook c"), (4, "window hook d"),
+    ]
+
+    # Editing "c" changes two boundaries, so the window is asked again.
+    assert window_worker("s", 1, ["a", "b", "c2", "d"], "gpt", index=index, incremental=True) == [
+        (2, "window hook b"), (3, "window hook c2"), (4, "window hook d"),
+    ]
+    # Editing the last chapter changes one boundary: a single pair request.
+    assert window_worker("s", 1, ["a", "b", "c", "d2"], "gpt", index=index, incremental=True) == [
+        (2, "window hook b"), (3, "window hook c"), (4, "pair hook d2"),
+    ]
+
+    assert windows == [1, 1]
+    assert pairs == ["s_chapter_4"]
+
+
+def test_incremental_is_rejected_with_the_batch_backends(monkeypatch):
+    monkeypatch.setattr("sys.argv", ["main.py", "abc", "--local-batch", "--incremental"])
+    with pytest.raises(SystemExit, match="--incremental"):
+        main.main()
+
+
+def test_pair_fallbacks_are_indexed_under_the_pair_prompt(index, monkeypatch):
+    monkeypatch.setattr(windowed, "generate_window_hooks", lambda first, chapters, model: {2: "window hook"})
+    monkeypatch.setattr(
+        windowed,
+        "process_chapter",
+        lambda chapter_id, previous_chapter_text, current_chapter_text, model: "pair hook",
+    )
+
+    window_worker("s", 1, ["a", "b", "c"], "gpt", index=index)
+
+    assert index.get("s", text_hash("a"), text_hash("b"), "gpt", WINDOW_PROMPT_VERSION) == "window hook"
+    assert index.get("s", text_hash("b"), text_hash("c"), "gpt", WINDOW_PROMPT_VERSION) is None
+    assert index.get("s", text_hash("b"), text_hash("c"), "gpt", PROMPT_VERSION) == "pair hook"
+
+    # A per-pair hook is reused by a later windowed run too.
+    monkeypatch.setattr(windowed, "process_chapter", None)
+    assert window_worker("s", 1, ["a", "b", "c"], "gpt", index=index, incremental=True) == [
+        (2, "window hook"), (3, "pair hook"),
+    ]
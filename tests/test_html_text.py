@@ -0,0 +1,22 @@
+from ingestion.html_text import html_to_text, iter_html_text
+
+HTML = "<p>First&nbsp;paragraph,\n  line one.<br>Line two.</p><script>var x;</script><p>Second &amp; last.</p>"
+TEXT = "First paragraph,\nline one.\nLine two.\n\nSecond & last."
+
+
+def test_paragraphs_breaks_and_entities():
+    assert html_to_text(HTML) == TEXT
+
+
+def test_chunking_does_not_change_the_text():
+    assert html_to_text(HTML, chunk_size=7) == TEXT
+    assert "".join(iter_html_text(HTML[i:i + 3] for i in range(0, len(HTML), 3))) == TEXT
+
+
+def test_escaped_markup_is_parsed():
+    escaped = "&lt;p&gt;One &amp;amp; two&lt;/p&gt;&lt;p&gt;Three&lt;/p&gt;"
+    assert html_to_text(escaped, chunk_size=5) == "One & two\n\nThree"
+
+
+def test_empty_document():
+    assert html_to_text("") == ""
@@ -0,0 +1,46 @@
+import os
+
+from pipeline.journal import HookJournal
+
+
+def test_resume_reuses_hooks_of_the_same_model(tmp_path):
+    path = str(tmp_path / "series.jsonl")
+    journal = HookJournal(path)
+    journal.record(2, "s_chapter_2", "gpt", hook="A hook.")
+    journal.record(3, "s_chapter_3", "gpt", error="timeout")
+    journal.close()
+
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"chapter_number": 4, "stat')
+
+    resumed = HookJournal(path, resume=True)
+    assert resumed.done_hook(2, "gpt") == "A hook."
+    assert resumed.done_hook(2, "grok") is None
+    assert resumed.done_hook(3, "gpt") is None
+    resumed.close()
+
+
+def test_later_failure_overrides_earlier_hook(tmp_path):
+    path = str(tmp_path / "series.jsonl")
+    journal = HookJournal(path)
+    journal.record(2, "s_chapter_2", "gpt", hook="A hook.")
+    journal.record(2, "s_chapter_2", "gpt", error="rejected")
+    journal.close()
+
+    resumed = HookJournal(path, resume=True)
+    assert resumed.done_hook(2, "gpt") is None
+    resumed.close()
+
+
+def test_fresh_run_rotates_existing_journal(tmp_path):
+    path = str(tmp_path / "series.jsonl")
+    journal = HookJournal(path)
+    journal.record(2, "s_chapter_2", "gpt", hook="A hook.")
+    journal.close()
+
+    HookJournal(path).close()
+
+    rotated = [name for name in os.listdir(tmp_path) if name.startswith("series.jsonl.")]
+    assert len(rotated) == 1
+    assert os.path.getsize(path) == 0
+    assert HookJournal(path, resume=True).completed == {}
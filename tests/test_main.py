@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+import main
+
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr("sys.argv", ["main.py", *argv])
+    return main.main()
+
+
+def test_dotenv_is_loaded_before_arguments_are_checked(monkeypatch):
+    loaded = []
+    monkeypatch.setattr(main, "load_dotenv", lambda: loaded.append(True))
+
+    with pytest.raises(SystemExit, match="doc"):
+        run_main(monkeypatch, "abc", "--output-format", "doc")
+    assert loaded == [True]
+
+
+def test_window_reaches_the_multi_series_runner(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    calls = {}
+
+    def run_batch(series_slugs, worker, **kwargs):
+        calls.update(kwargs, slugs=series_slugs, worker=worker.func)
+        return {}
+
+    monkeypatch.setattr(main, "run_batch", run_batch)
+    run_main(monkeypatch, "one", "two", "--window", "4", "--metrics", str(tmp_path / "metrics"))
+
+    assert calls["slugs"] == ["one", "two"]
+    assert calls["window"] == 4
+    assert calls["worker"] is main.window_hook_worker
+
+
+def fake_run_batch(series_slugs, worker, sink_factory, **kwargs):
+    for slug in series_slugs:
+        with sink_factory(slug) as sink:
+            sink.write(2, "hook")
+    return {slug: 1 for slug in series_slugs}
+
+
+def test_metrics_and_progress_files_are_opt_in(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "run_batch", fake_run_batch)
+
+    run_main(monkeypatch, "one", "two", "--output-format", "csv")
+
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ["one_grok.csv", "two_grok.csv"]
+
+
+def test_metrics_and_progress_files_when_asked(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "run_batch", fake_run_batch)
+
+    run_main(monkeypatch, "one", "two", "--output-format", "csv", "--progress", "--metrics", "out/run")
+
+    assert (tmp_path / "one_hooks.jsonl").read_text(encoding="utf-8").strip() == '{"chapter_number": 2, "hook": "hook"}'
+    assert (tmp_path / "two_hooks.jsonl").exists()
+    assert (tmp_path / "out" / "run.json").exists()
+    assert (tmp_path / "out" / "run.prom").exists()
@@ -0,0 +1,85 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from llm.usage import UsageTracker
+from metrics import Histogram, Metrics
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = UsageTracker()
+    monkeypatch.setattr("metrics.usage_tracker", tracker)
+    monkeypatch.delenv("LLM_PRICES", raising=False)
+    return tracker
+
+
+def test_quantiles_interpolate_inside_buckets():
+    hist = Histogram(buckets=(1, 2, 4))
+    for value in (0.5, 1.5, 1.5, 3):
+        hist.observe(value)
+
+    assert hist.count == 4
+    assert hist.counts == [1, 2, 1, 0]
+    assert hist.quantile(0.5) == pytest.approx(1.5)
+    assert hist.quantile(1.0) == pytest.approx(3)
+    assert Histogram().quantile(0.5) == 0.0
+
+
+def test_summary_is_capped_at_the_largest_value():
+    hist = Histogram(buckets=(1, 10))
+    hist.observe(2)
+    summary = hist.summary()
+    assert summary["count"] == 1
+    assert summary["p99_s"] <= summary["max_s"] == 2
+
+
+def test_report_collects_stages_models_and_counters(tracker):
+    metrics = Metrics()
+    with metrics.stage("cleaning"):
+        pass
+    with metrics.llm_call("model-a"):
+        pass
+    metrics.increment("regenerations", 2)
+
+    report = metrics.report()
+    assert report["stages"]["cleaning"]["count"] == 1
+    assert report["stages"]["llm_call"]["count"] == 1
+    assert report["llm_latency"]["model-a"]["count"] == 1
+    assert report["counters"] == {"regenerations": 2}
+
+    metrics.reset()
+    assert metrics.report()["counters"] == {}
+
+
+def test_cost_for_priced_models(tracker, monkeypatch):
+    monkeypatch.setenv("LLM_PRICES", json.dumps({"model-a": {"prompt": 1, "cached": 0.5, "completion": 2}}))
+    tracker.record("model-a", SimpleNamespace(
+        prompt_tokens=1_000_000,
+        completion_tokens=1_000_000,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=500_000),
+    ))
+    tracker.record("model-b", SimpleNamespace(prompt_tokens=10, completion_tokens=10))
+
+    usage = Metrics().report()["usage"]
+    assert usage["model-a"]["cost_usd"] == pytest.approx(0.5 + 0.25 + 2)
+    assert "cost_usd" not in usage["model-b"]
+
+
+def test_prometheus_text_and_files(tracker, tmp_path):
+    metrics = Metrics()
+    metrics.observe_llm("model-a", 0.3)
+    metrics.increment("llm_cache_hits")
+
+    text = metrics.prometheus()
+    assert 'hookgen_llm_latency_seconds_bucket{model="model-a",le="0.5"} 1' in text
+    assert 'hookgen_llm_latency_seconds_count{model="model-a"} 1' in text
+    assert 'hookgen_events_total{event="llm_cache_hits"} 1' in text
+
+    prefix = tmp_path / "out" / "run_metrics"
+    metrics.write(str(prefix))
+    with open(f"{prefix}.json", encoding="utf-8") as f:
+        assert json.load(f)["counters"] == {"llm_cache_hits": 1}
+    with open(f"{prefix}.prom", encoding="utf-8") as f:
+        assert f.read() == text
@@ -0,0 +1,159 @@
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from pipeline.multi_series import read_series_slugs, run_batch
+
+
+class FakeIngestor:
+    def __init__(self, series):
+        self.series = series
+        self.closed = False
+
+    def iter_series_chapters(self, series_slug, language="en"):
+        yield from self.series[series_slug]
+
+    def close(self):
+        self.closed = True
+
+
+class RecordingSink:
+    def __init__(self):
+        self.rows = []
+        self.skipped = []
+        self.closed = False
+
+    def write(self, chapter_number, hook):
+        self.rows.append((chapter_number, hook))
+
+    def skip(self, chapter_number):
+        self.skipped.append(chapter_number)
+
+    def close(self):
+        self.closed = True
+
+
+def worker(series_slug, idx, prev_text, curr_text):
+    return idx + 1, f"{prev_text}>{curr_text}"
+
+
+def test_read_series_slugs(tmp_path):
+    path = tmp_path / "slugs.txt"
+    path.write_text("# backfill\nabc\n\n  def  # second\n", encoding="utf-8")
+    assert read_series_slugs(str(path)) == ["abc", "def"]
+
+
+def test_every_series_is_written_and_closed():
+    series = {
+        "one": ["a", "b", "c"],
+        "two": ["x", "y"],
+        "three": ["only"],
+    }
+    sinks = {}
+
+    def sink_factory(slug):
+        sinks[slug] = RecordingSink()
+        return sinks[slug]
+
+    written = run_batch(
+        list(series),
+        worker,
+        sink_factory,
+        llm_workers=2,
+        max_active_series=2,
+        ingestor=FakeIngestor(series),
+    )
+
+    assert written == {"one": 2, "two": 1, "three": 0}
+    assert sorted(sinks["one"].rows) == [(2, "a>b"), (3, "b>c")]
+    assert sinks["two"].rows == [(2, "x>y")]
+    assert all(sink.closed for sink in sinks.values())
+
+
+def test_failed_chapters_are_skipped():
+    series = {"one": ["a", "b", "c", "d"]}
+    sink = RecordingSink()
+
+    def failing_worker(series_slug, idx, prev_text, curr_text):
+        if curr_text == "c":
+            raise RuntimeError("boom")
+        return worker(series_slug, idx, prev_text, curr_text)
+
+    written = run_batch(
+        list(series),
+        failing_worker,
+        lambda slug: sink,
+        llm_workers=2,
+        ingestor=FakeIngestor(series),
+    )
+
+    assert written == {"one": 2}
+    assert sorted(sink.rows) == [(2, "a>b"), (4, "c>d")]
+    assert sink.skipped == [3]
+    assert sink.closed
+
+
+def test_windows_cover_every_boundary_of_every_series():
+    series = {
+        "one": [f"a{i}" for i in range(1, 8)],
+        "two": ["x", "y"],
+        "three": ["only"],
+    }
+    sinks = {}
+
+    def sink_factory(slug):
+        sinks[slug] = RecordingSink()
+        return sinks[slug]
+
+    def window_worker(series_slug, first_number, chapters):
+        # The last boundary of each window goes missing.
+        return [
+            (first_number + i, f"{chapters[i - 1]}>{chapters[i]}")
+            for i in range(1, len(chapters))
+            if len(chapters) == 2 or i < len(chapters) - 1
+        ]
+
+    written = run_batch(
+        list(series),
+        window_worker,
+        sink_factory,
+        llm_workers=2,
+        ingestor=FakeIngestor(series),
+        window=3,
+    )
+
+    assert written == {"one": 3, "two": 1, "three": 0}
+    assert sorted(sinks["one"].rows) == [(2, "a1>a2"), (4, "a3>a4"), (6, "a5>a6")]
+    assert sorted(sinks["one"].skipped) == [3, 5, 7]
+    assert sinks["two"].rows == [(2, "x>y")]
+    assert all(sink.closed for sink in sinks.values())
+
+
+def test_given_ingestor_is_left_open():
+    series = {"one": ["a", "b"]}
+    ingestor = FakeIngestor(series)
+
+    run_batch(list(series), worker, lambda slug: RecordingSink(), ingestor=ingestor)
+
+    assert not ingestor.closed
+
+
+def test_sinks_are_closed_when_the_run_stops_early():
+    series = {"one": ["a", "b", "c"], "two": ["x", "y", "z"]}
+    sinks = {}
+
+    class BrokenSink(RecordingSink):
+        def write(self, chapter_number, hook):
+            raise OSError("disk full")
+
+    def sink_factory(slug):
+        sinks[slug] = BrokenSink() if slug == "one" else RecordingSink()
+        return sinks[slug]
+
+    with pytest.raises(OSError):
+        run_batch(list(series), worker, sink_factory, ingestor=FakeIngestor(series))
+
+    assert all(sink.closed for sink in sinks.values())
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+
+from llm import rate_limiter
+from llm.rate_limiter import AdaptiveLimiter, estimate_tokens, rate_limited
+
+
+class Overloaded(Exception):
+    def __init__(self, status_code=429, retry_after=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = type("Response", (), {"headers": headers})()
+
+
+def limiter(**kwargs):
+    return AdaptiveLimiter(max_rps=1000, base_backoff=0, **kwargs)
+
+
+def test_retryable_errors_are_retried_and_shrink_concurrency():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise Overloaded()
+        return "ok"
+
+    lim = limiter(initial_concurrency=8)
+    assert lim.call(flaky) == "ok"
+    assert len(attempts) == 3
+    assert lim.limit < 8
+
+
+def test_other_errors_are_not_retried():
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        limiter().call(broken)
+    assert len(attempts) == 1
+
+
+def test_gives_up_after_max_retries():
+    def always_overloaded():
+        raise Overloaded(503)
+
+    with pytest.raises(Overloaded):
+        limiter(max_retries=2).call(always_overloaded)
+
+
+def test_retry_after_is_honoured():
+    lim = limiter(max_backoff=60)
+    assert lim._backoff(0, Overloaded(retry_after=7)) == 7
+    assert limiter(max_backoff=5)._backoff(0, Overloaded(retry_after=7)) == 5
+
+
+def test_fast_successes_grow_concurrency():
+    lim = limiter(initial_concurrency=2, max_concurrency=4)
+    for _ in range(10):
+        lim.call(lambda: None)
+    assert 2 < lim.limit <= 4
+
+
+def test_in_flight_calls_stay_within_the_limit():
+    lim = limiter(initial_concurrency=2, max_concurrency=2)
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.02)
+        with lock:
+            running.pop()
+
+    threads = [threading.Thread(target=lim.call, args=(call,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
+
+
+def test_estimate_tokens():
+    messages = [{"role": "user", "content": "x" * 300}]
+    assert estimate_tokens(messages, 100) == 200
+
+
+def test_rate_limited_counts_every_choice(monkeypatch):
+    estimates = []
+
+    class Recorder:
+        def call(self, fn, *args, estimated_tokens=0, **kwargs):
+            estimates.append(estimated_tokens)
+            return fn(*args, **kwargs)
+
+    monkeypatch.setattr(rate_limiter, "_limiter", Recorder())
+
+    @rate_limited
+    def complete(messages, model, temperature, max_tokens, n=None):
+        return "hook"
+
+    messages = [{"role": "user", "content": "x" * 300}]
+    complete(messages, "gpt", 0.7, 100)
+    complete(messages, "gpt", 0.7, 100, n=3)
+    assert estimates == [200, 400]
@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from llm.gateway import RequestCancelled
+from llm.router import CircuitBreaker, CircuitOpenError, ModelRouter
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_breaker_opens_after_threshold_and_lets_one_trial_through():
+    breaker = CircuitBreaker("a", failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_the_breaker():
+    breaker = CircuitBreaker("a", failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+
+def test_errors_and_unusable_answers_fail_over():
+    router = ModelRouter(["a", "b", "c"], hedge_delay=5, failure_threshold=1, reset_timeout=60)
+    tried = []
+
+    def request(model, cancel):
+        tried.append(model)
+        if model == "a":
+            raise ValueError("boom")
+        return {"b": ""}.get(model, f"hook from {model}")
+
+    assert router.call(request) == "hook from c"
+    assert tried == ["a", "b", "c"]
+
+    # The error opened the circuit of "a"; the empty answer did not count
+    # against "b", so the next call starts there.
+    tried.clear()
+    assert router.call(request) == "hook from c"
+    assert tried == ["b", "c"]
+
+
+def test_slow_model_is_hedged_on_the_next_one():
+    router = ModelRouter(["a", "b"], hedge_delay=0.05)
+    cancelled = threading.Event()
+
+    def request(model, cancel):
+        if model == "b":
+            return "hook from b"
+        while not cancel.is_set():
+            time.sleep(0.01)
+        cancelled.set()
+        raise RequestCancelled(model)
+
+    assert router.call(request) == "hook from b"
+    assert cancelled.wait(2.0)
+    assert router.breakers["a"].allow()
+
+
+def test_every_circuit_open_raises():
+    router = ModelRouter(["a"], failure_threshold=1, reset_timeout=60)
+    router.breakers["a"].record_failure()
+    with pytest.raises(CircuitOpenError):
+        router.call(lambda model, cancel: "hook")
+
+
+def test_losing_trial_request_releases_its_slot():
+    router = ModelRouter(["a", "b"], hedge_delay=0.05, failure_threshold=1, reset_timeout=0.05)
+    breaker = router.breakers["a"]
+    breaker.record_failure()
+    time.sleep(0.06)
+
+    started = threading.Event()
+    finished = threading.Event()
+
+    def request(model, cancel):
+        if model == "b":
+            return "hook"
+        started.set()
+        try:
+            while not cancel.is_set():
+                time.sleep(0.01)
+            raise RequestCancelled(model)
+        finally:
+            finished.set()
+
+    assert router.call(request) == "hook"
+    assert started.is_set()
+    assert finished.wait(2.0)
+
+    # The trial on "a" lost to the hedge on "b"; its slot must be free again.
+    assert wait_until(breaker.allow)
+    assert breaker.is_open
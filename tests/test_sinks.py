@@ -0,0 +1,98 @@
+import csv
+import json
+
+import pytest
+
+from pipeline.sinks import FanoutSink, OrderedSink, Sink, open_sink
+
+
+class ListSink(Sink):
+    def __init__(self):
+        self.rows = []
+        self.closed = False
+
+    def write(self, chapter_number, hook):
+        self.rows.append((chapter_number, hook))
+
+    def close(self):
+        self.closed = True
+
+
+def test_sink_needs_write():
+    with pytest.raises(TypeError):
+        Sink()
+
+
+def test_rows_are_released_in_chapter_order():
+    out = ListSink()
+    sink = OrderedSink(out, first_chapter=2)
+    sink.write(4, "four")
+    sink.write(3, "three")
+    assert out.rows == []
+    sink.write(2, "two")
+    assert out.rows == [(2, "two"), (3, "three"), (4, "four")]
+
+
+def test_skipped_chapters_unblock_later_ones():
+    out = ListSink()
+    sink = OrderedSink(out, first_chapter=2)
+    sink.write(3, "three")
+    sink.skip(2)
+    assert out.rows == [(3, "three")]
+
+
+def test_full_buffer_gives_up_on_the_oldest_gap():
+    out = ListSink()
+    sink = OrderedSink(out, first_chapter=2, max_buffer=2)
+    sink.write(3, "three")
+    sink.write(4, "four")
+    sink.write(5, "five")
+    assert out.rows == [(3, "three"), (4, "four"), (5, "five")]
+    sink.write(2, "two")
+    assert out.rows[-1] == (2, "two")
+
+
+def test_close_flushes_what_is_left():
+    out = ListSink()
+    sink = OrderedSink(out, first_chapter=2)
+    sink.write(5, "five")
+    sink.write(3, "three")
+    sink.close()
+    assert out.rows == [(3, "three"), (5, "five")]
+    assert out.closed
+
+
+def test_file_sinks_by_extension(tmp_path):
+    jsonl = open_sink(str(tmp_path / "hooks.jsonl"))
+    csv_sink = open_sink(str(tmp_path / "hooks.csv"))
+    with FanoutSink([jsonl, csv_sink]) as sink:
+        sink.write(2, "पहला हुक")
+        sink.write(3, "second, with a comma")
+
+    with open(tmp_path / "hooks.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line) for line in f] == [
+            {"chapter_number": 2, "hook": "पहला हुक"},
+            {"chapter_number": 3, "hook": "second, with a comma"},
+        ]
+
+    with open(tmp_path / "hooks.csv", encoding="utf-8-sig", newline="") as f:
+        assert list(csv.reader(f)) == [
+            ["chapter_number", "hook"],
+            ["2", "पहला हुक"],
+            ["3", "second, with a comma"],
+        ]
+
+
+def test_xlsx_sink(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+
+    with open_sink(str(tmp_path / "hooks.xlsx")) as sink:
+        sink.write(2, "hook")
+
+    rows = list(openpyxl.load_workbook(tmp_path / "hooks.xlsx").active.values)
+    assert rows == [("chapter_number", "hook"), (2, "hook")]
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        open_sink("hooks.txt")
@@ -0,0 +1,37 @@
+from pipeline.stream_guard import HookStreamGuard
+from pipeline.validator import MAX_WORDS
+
+
+def test_stops_at_explanation():
+    text = "Meera opens the letter and freezes.\n\nExplanation: this builds suspense"
+    assert HookStreamGuard().check(text) == text.index("\n\n")
+
+
+def test_keeps_looking_past_leading_blank_lines():
+    text = "\n\nMeera opens the letter and freezes.\n\nNote: twist"
+    assert HookStreamGuard().check(text) == text.index("\n\nNote")
+
+
+def test_stops_after_two_sentences():
+    text = "Meera opens the letter. Her hands shake. Then"
+    end = HookStreamGuard().check(text)
+    assert text[:end] == "Meera opens the letter. Her hands shake."
+
+
+def test_keeps_streaming_while_within_limits():
+    assert HookStreamGuard().check("Meera opens the letter and") is None
+
+
+def test_cuts_runaway_text_after_max_words():
+    text = " ".join(["word"] * (MAX_WORDS + 5))
+    end = HookStreamGuard().check(text)
+    assert len(text[:end].split()) == MAX_WORDS + 1
+
+
+def test_finalize_drops_leading_label():
+    assert HookStreamGuard().finalize("Hook: Meera opens the letter. ") == "Meera opens the letter."
+
+
+def test_apply_cuts_and_finalizes_a_whole_response():
+    text = "Hook: Meera opens the letter and freezes.\n\nExplanation: this builds suspense"
+    assert HookStreamGuard().apply(text) == "Meera opens the letter and freezes."
@@ -0,0 +1,74 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pipeline.streaming import iter_chapter_pairs, run_series_pipeline
+
+
+def test_pairs_are_numbered_by_current_chapter():
+    assert list(iter_chapter_pairs(["a", "b", "c"])) == [(1, "a", "b"), (2, "b", "c")]
+    assert list(iter_chapter_pairs(["a"])) == []
+
+
+def test_every_pair_reaches_on_result():
+    results = {}
+
+    def worker(series_slug, idx, prev_text, curr_text):
+        return idx + 1, f"{series_slug}:{prev_text}>{curr_text}"
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        submitted = run_series_pipeline(
+            "s", ["a", "b", "c", "d"], worker, results.__setitem__, executor, max_pending=2
+        )
+
+    assert submitted == 3
+    assert results == {2: "s:a>b", 3: "s:b>c", 4: "s:c>d"}
+
+
+def test_failed_pairs_reach_on_failure():
+    results = {}
+    failed = []
+
+    def worker(series_slug, idx, prev_text, curr_text):
+        if curr_text == "c":
+            raise RuntimeError("boom")
+        return idx + 1, curr_text
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        run_series_pipeline(
+            "s", ["a", "b", "c", "d"], worker, results.__setitem__, executor,
+            on_failure=failed.append,
+        )
+
+    assert results == {2: "b", 4: "d"}
+    assert failed == [3]
+
+
+def test_ingestion_waits_for_pending_hooks():
+    release = threading.Event()
+    consumed = []
+
+    def chapters():
+        for i in range(20):
+            consumed.append(i)
+            yield f"chapter {i}"
+
+    def worker(series_slug, idx, prev_text, curr_text):
+        release.wait(5)
+        return idx + 1, "hook"
+
+    results = []
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        runner = threading.Thread(
+            target=run_series_pipeline,
+            args=("s", chapters(), worker, lambda n, h: results.append(n), executor),
+            kwargs={"max_pending": 2},
+        )
+        runner.start()
+        time.sleep(0.2)
+        # Two pairs in flight plus the chapter that is waiting for a slot.
+        assert len(consumed) <= 4
+        release.set()
+        runner.join(5)
+
+    assert sorted(results) == list(range(2, 21))
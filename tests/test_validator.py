@@ -0,0 +1,37 @@
+from pipeline.validator import check_hook, count_words, score_hook, validate_hook
+
+GOOD = "Meera finally opens the sealed letter, and the name inside makes her blood run cold."
+
+
+def test_good_hook_passes():
+    assert validate_hook(GOOD)
+
+
+def test_length_limits():
+    assert check_hook("Too short.").reasons == ["too short (2 words)"]
+    assert not validate_hook(" ".join(["word"] * 40) + ".")
+
+
+def test_dash_and_meta_reference_are_rejected():
+    assert "contains hyphen or dash" in check_hook(GOOD.replace(", and", " — and")).reasons
+    assert "refers to the chapter itself" in check_hook("In the next chapter Meera finally opens the letter.").reasons
+
+
+def test_labels_and_markdown_are_rejected():
+    assert not validate_hook("Hook: " + GOOD)
+    assert not validate_hook("**" + GOOD + "**")
+
+
+def test_copied_text_is_rejected():
+    chapter = "She whispered that the old well behind the temple hides the truth about her father."
+    hook = "Meera remembers that the old well behind the temple hides a secret."
+    assert "copies text from the chapter" in check_hook(hook, [chapter]).reasons
+    assert validate_hook(GOOD, [chapter])
+
+
+def test_devanagari_words_are_counted_whole():
+    assert count_words("मीरा ने चिट्ठी खोली") == 4
+
+
+def test_score_prefers_valid_hooks():
+    assert score_hook(GOOD) > score_hook("Hook: " + GOOD)
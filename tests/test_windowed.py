@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("httpx")
+pytest.importorskip("dotenv")
+
+from pipeline import windowed
+from pipeline.windowed import (
+    iter_chapter_windows,
+    parse_window_hooks,
+    run_windowed_pipeline,
+    window_worker,
+)
+
+CHAPTERS = [f"chapter {i}" for i in range(1, 9)]
+
+
+def boundaries(first, chapters):
+    return list(range(first + 1, first + len(chapters)))
+
+
+def test_windows_share_one_chapter_and_cover_every_boundary():
+    windows = list(iter_chapter_windows(CHAPTERS, 4))
+
+    assert windows == [
+        (1, ["chapter 1", "chapter 2", "chapter 3", "chapter 4"]),
+        (4, ["chapter 4", "chapter 5", "chapter 6", "chapter 7"]),
+        (7, ["chapter 7", "chapter 8"]),
+    ]
+    covered = [n for first, window in windows for n in boundaries(first, window)]
+    assert covered == list(range(2, 9))
+
+
+def test_windows_of_a_short_series():
+    assert list(iter_chapter_windows(["only"], 4)) == []
+    assert list(iter_chapter_windows(["a", "b"], 4)) == [(1, ["a", "b"])]
+
+
+def test_parse_window_hooks_tolerates_fences_and_stray_text():
+    answer = 'Here you go:\n```json\n{"hooks": [{"chapter": 2, "hook": " First. "}, {"chapter": "3", "hook": "Second."}]}\n```'
+    assert parse_window_hooks(answer) == {2: "First.", 3: "Second."}
+
+
+def test_parse_window_hooks_skips_bad_items():
+    answer = '{"hooks": [{"chapter": "x", "hook": "a"}, {"hook": "b"}, {"chapter": 4, "hook": ""}, {"chapter": 5, "hook": "ok"}]}'
+    assert parse_window_hooks(answer) == {5: "ok"}
+    assert parse_window_hooks("not json at all") == {}
+    assert parse_window_hooks('{"hooks": [') == {}
+    assert parse_window_hooks(None) == {}
+
+
+def test_missing_boundaries_fall_back_to_single_pairs(monkeypatch):
+    pairs = []
+
+    def process_chapter(chapter_id, previous_chapter_text, current_chapter_text, model):
+        pairs.append((previous_chapter_text, current_chapter_text))
+        return f"pair hook for {chapter_id}"
+
+    monkeypatch.setattr(windowed, "generate_window_hooks", lambda first, chapters, model: {2: "window hook"})
+    monkeypatch.setattr(windowed, "process_chapter", process_chapter)
+
+    hooks = window_worker("s", 1, CHAPTERS[:4], "gpt")
+
+    assert hooks == [
+        (2, "window hook"),
+        (3, "pair hook for s_chapter_3"),
+        (4, "pair hook for s_chapter_4"),
+    ]
+    assert pairs == [("chapter 2", "chapter 3"), ("chapter 3", "chapter 4")]
+
+
+def test_pipeline_writes_every_boundary(monkeypatch):
+    def generate_window_hooks(first, chapters, model):
+        return {n: f"hook {n}" for n in boundaries(first, chapters)}
+
+    def process_chapter(chapter_id, previous_chapter_text, current_chapter_text, model):
+        return f"hook {chapter_id.rsplit('_', 1)[1]}"
+
+    monkeypatch.setattr(windowed, "generate_window_hooks", generate_window_hooks)
+    monkeypatch.setattr(windowed, "process_chapter", process_chapter)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        submitted = run_windowed_pipeline(
+            "s", iter(CHAPTERS), results.__setitem__, executor, window_size=3, max_pending=1
+        )
+
+    assert submitted == 4
+    assert results == {n: f"hook {n}" for n in range(2, 9)}